@@ -1,185 +1,216 @@
 
-from typing import Any, Callable, Dict, Optional, Protocol, Set, TYPE_CHECKING, Tuple, Type, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, Set, TYPE_CHECKING, Tuple, Type, Union
 from contextlib import suppress
-import datetime
-import zipfile
 import os
-import re
+import sys
 import threading
-import urllib
-import urllib.request
+import time
 import bpy
 import addon_utils
 from bpy.types import Operator
-from bpy.props import BoolProperty, EnumProperty, FloatProperty, StringProperty
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
 if TYPE_CHECKING:
-    from bpy.types import Context, Event, Preferences, Text
+    import queue
+    import zipfile
+    from bpy.types import Context, Event, Preferences
     class AddonModule(Protocol):
         __name__: str
         __file__: str
         bl_info: Dict[str, Any]
 
-_opname_pattern = re.compile(r'(?<!^)(?=[A-Z])')
-_addon_module_name = ""
-_update_check_url = ""
-_update_script = ''' 
-import bpy
-import addon_utils
-import os
-import shutil
-import pathlib
-import zipfile
-import tempfile
-
-PROPS = [
-    ("check_for_updates_at_startup", False),
+_registry: Dict[str, '_AddonRegistration'] = {}
+_download_chunk_size = 64 * 1024
+_download_segments = 1
+_download_segment_min_size = 4 * 1024 * 1024
+_download_segments_max = 8
+_cache_directory = ""
+_check_cache_ttl = 3600.0
+_validation_parallel_size = 8 * 1024 * 1024
+_stream_extract = False
+_validation_cache_lock = threading.Lock()
+_event_queue: Optional['queue.SimpleQueue[Tuple[Callable, Tuple[Any, ...], bool]]'] = None
+_event_pending = 0
+_event_spinners: Dict[str, float] = {}
+_event_interval_min = 0.05
+_event_interval_max = 1.0
+_event_interval = _event_interval_min
+_progress_report_step = 0.01
+_progress_report_interval = 1.0
+_worker_executor = None
+_worker_executor_lock = threading.Lock()
+_worker_handlers: Set[Any] = set()
+_worker_max = 4
+_check_timeout = 30.0
+_download_timeout = 0.0
+_addon_operations: Dict[str, Any] = {}
+_trace_log = ""
+_trace_callbacks: List[Callable[[Dict[str, Any]], None]] = []
+_trace_lock = threading.Lock()
+_trace_count = 0
+_mirror_race_count = 3
+_mirror_stagger = 0.25
+_mirror_retry_after = 600.0
+_mirror_stats: Optional[Dict[str, Dict[str, float]]] = None
+_mirror_lock = threading.Lock()
+_mirror_connect_timeout = 5.0
+_mirror_races: Set[threading.Event] = set()
+_accept_encoding = "gzip, deflate"
+_download_cache_size = 512 * 1024 * 1024
+_download_cache_lock = threading.Lock()
+_download_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_download_cache_pinned: Dict[str, str] = {}
+_prefetch_operations: Dict[str, Tuple[str, Any]] = {}
+_lock_stale_after = 60.0
+_lock_poll_interval = 1.0
+_prefetched_releases: Dict[str, Tuple[str, str]] = {}
+_backup_mode = 'RENAME'
+_backup_limit = 3
+_backup_max_size = 1 << 30
+_addon_module_index: Dict[str, Tuple['AddonModule', float]] = {}
+_addon_module_index_valid = False
+_addon_module_index_stats = {"hits": 0, "misses": 0, "builds": 0}
+_addon_modules_refresh = None
+_preserved_preferences = (
+    ("check_for_updates_on_startup", False),
     ("api_token", ""),
-    ("include_unstable", False)
-    ]
+    ("include_unstable", False),
+    ("prefetch_updates", False),
+    ("prefetch_rate_limit", 1024),
+    )
 
 
-def set_error(prefs, error, reenable=False, reinstall=None):
-    print(error)
-    prefs.update_status = "ERROR"
-    prefs.update_error = str(error)
-    if reinstall:
-        try:
-            addon_utils.disable("<ADDON>", default_set=True)
-            shutil.rmtree(reinstall[0])
-            addon_utils.modules_refresh()
-            bpy.ops.preferences.addon_install(filepath=reinstall[1])
-            bpy.ops.preferences.addon_enable(module="<ADDON>")
-        except Exception as error:
-            msg = "A backup of the addon was created at " + reinstall[1]
-            def draw_func(self, _):
-                layout = self.layout
-                layout.separator()
-                layout.label(icon="BLANK1", text="An unexpected error occurred. See console for  details")
-                layout.label(icon="BLANK1", text=msg)
-                layout.label(icon="BLANK1", text="Please reinstall the addon manually.")
-                layout.separator()
-            bpy.context.window_manager.popup_menu(draw_func,
-                                                  title="Reinstallation Failed",
-                                                  icon="ERROR")
-    elif reenable:
-        try:
-            addon_utils.enable(module="<ADDON>")
-        except: pass
+def _get_preferences(context: Optional['Context']=None) -> Optional['Preferences']:
+    with suppress(Exception):
+        context = bpy.context if context is None else context
+        return context.preferences
 
 
-def make_backup(path):
-    srcpath = pathlib.Path(path).expanduser().resolve(strict=True)
-    dirpath = tempfile.mkdtemp()
-    zippath = os.path.join(dirpath, "<ADDON>_backup.zip")
+def _get_addon_preferences(name: str, context: Optional['Context']=None) -> Optional['AddonUpdatePreferences']:
+    with suppress(Exception):
+        return _get_preferences(context).addons[name].preferences
 
-    with zipfile.ZipFile(zippath, "w", zipfile.ZIP_DEFLATED) as file:
-        for item in srcpath.rglob("*.py"):
-            file.write(item, item.relative_to(srcpath.parent))
 
-    return zippath
+def _get_file_mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return -1.0
 
 
-def install_update():
-    prefs = bpy.context.preferences.addons["<ADDON>"].preferences
-    props = [(key, prefs.get(key, default)) for key, default in PROPS]
-    prefs = None
+def _build_addon_module_index(refresh: Optional[bool]=False) -> None:
+    global _addon_module_index_valid
+    index = {mod.__name__: (mod, _get_file_mtime(mod.__file__)) for mod in addon_utils.modules(refresh=refresh)}
+    _addon_module_index.clear()
+    _addon_module_index.update(index)
+    _addon_module_index_valid = True
+    _addon_module_index_stats["builds"] += 1
 
-    path = ""
-    for item in addon_utils.modules():
-        if item.__name__ == "<ADDON>" and os.path.exists(item.__file__):
-            path = os.path.dirname(item.__file__)
 
-    if not path:
-        return set_error(prefs, "Failed to find addon directory")
+def _invalidate_addon_module_index() -> None:
+    global _addon_module_index_valid
+    _addon_module_index_valid = False
 
-    backup_path = ""
-    try:
-        backup_path = make_backup(path)
-    except Exception as error:
-        return set_error(prefs, error)
 
+def _modules_refresh_hook(*args, **kwargs) -> None:
     try:
-        addon_utils.disable("<ADDON>", default_set=True)
-    except Exception as error:
-        return set_error(prefs, error, reenable=True)
+        return _addon_modules_refresh(*args, **kwargs)
+    finally:
+        _invalidate_addon_module_index()
 
-    try:
-        shutil.rmtree(path)
-    except Exception as error:
-        return set_error(prefs, error, reenable=True)
 
-    try:
-        addon_utils.modules_refresh()
-    except Exception as error:
-        return set_error(prefs, error, reinstall=(path, backup_path))
+def _install_modules_refresh_hook() -> None:
+    global _addon_modules_refresh
+    if _addon_modules_refresh is None:
+        _addon_modules_refresh = addon_utils.modules_refresh
+        addon_utils.modules_refresh = _modules_refresh_hook
 
-    try:
-        bpy.ops.preferences.addon_install(filepath=r"<FILEPATH>")
-    except Exception as error:
-        return set_error(prefs, error, reinstall=(path, backup_path))
 
-    try:
-        bpy.ops.preferences.addon_enable(module="<ADDON>")
-    except Exception as error:
-        return set_error(prefs, error, reinstall=(path, backup_path))
-    else:
-        prefs = bpy.context.preferences.addons["<ADDON>"].preferences
-        prefs["new_release_version"] = ""
-        prefs["new_release_url"] = ""
-        prefs["new_release_date"] = ""
-        prefs["new_release_path"] = ""
-        prefs["update_error"] = ""
-        prefs["update_status"] = 0
-        for key, value in props:
-            prefs[key] = value
-        bpy.ops.preferences.addon_expand(module="<ADDON>")
+def _remove_modules_refresh_hook() -> None:
+    global _addon_modules_refresh
+    # Another copy of this module may have wrapped the hook since. In that case leave the
+    # chain intact, invalidating an unused index is harmless.
+    if _addon_modules_refresh is not None and addon_utils.modules_refresh is _modules_refresh_hook:
+        addon_utils.modules_refresh = _addon_modules_refresh
+        _addon_modules_refresh = None
 
-if __name__ == "__main__":
-    bpy.app.timers.register(install_update, first_interval=1)
 
-'''
+def _lookup_addon_module(name: str) -> Optional['AddonModule']:
+    if _addon_module_index_valid:
+        entry = _addon_module_index.get(name)
+        if entry is not None and _get_file_mtime(entry[0].__file__) == entry[1]:
+            _addon_module_index_stats["hits"] += 1
+            return entry[0]
 
+    _addon_module_index_stats["misses"] += 1
 
-def _get_preferences(context: Optional['Context']=None) -> Optional['Preferences']:
-    with suppress(Exception):
-        context = bpy.context if context is None else context
-        return context.preferences
+    # An invalidated index is rebuilt from addon_utils' own module cache, which was just
+    # refreshed. A valid index that cannot answer means that cache is stale (file changed
+    # on disk or addon newly installed) so the search paths are rescanned.
+    refresh = _addon_module_index_valid
+    _build_addon_module_index(refresh=refresh)
 
+    entry = _addon_module_index.get(name)
+    if entry is None and not refresh:
+        _build_addon_module_index(refresh=True)
+        entry = _addon_module_index.get(name)
 
-def _get_addon_preferences(context: Optional['Context']=None) -> Optional['AddonUpdatePreferences']:
-    with suppress(Exception):
-        return _get_preferences(context).addons[_addon_module_name].preferences
+    return entry[0] if entry is not None else None
+
+
+def _get_addon_module(name: str) -> Optional['AddonModule']:
+    return _lookup_addon_module(name)
 
 
-def _get_addon_module() -> Optional['AddonModule']:
-    return next((mod for mod in addon_utils.modules() if mod.__name__ == _addon_module_name), None)
+def addon_module_index_stats() -> Dict[str, int]:
+    return dict(_addon_module_index_stats, size=len(_addon_module_index), valid=int(_addon_module_index_valid))
 
 
-def _get_addon_info(default: Optional[Dict[str, Any]]=None) -> Optional[Dict[str, Any]]:
-    mod = _get_addon_module()
+def _get_addon_info(name: str, default: Optional[Dict[str, Any]]=None) -> Optional[Dict[str, Any]]:
+    mod = _get_addon_module(name)
     return mod.bl_info if mod is not None else default
 
 
-def _get_addon_info_value(key: str, default: Optional[Any]=None) -> Any:
-    return _get_addon_info({}).get(key, default)
+def _get_addon_info_value(name: str, key: str, default: Optional[Any]=None) -> Any:
+    return _get_addon_info(name, {}).get(key, default)
 
 
 def _version_tuple_to_string(version: Tuple[int, int, int]) -> str:
     return ".".join(map(str, version))
 
 
-def _get_request_params(prefs: 'AddonUpdatePreferences', version: Tuple[int, int, int]) -> Dict[str, str]:
+def _get_request_params(name: str,
+                        prefs: 'AddonUpdatePreferences',
+                        version: Tuple[int, int, int]) -> Dict[str, str]:
     return {
         "blender_version": _version_tuple_to_string(bpy.app.version),
-        "addon_name": _addon_module_name,
+        "addon_name": name,
         "addon_version": _version_tuple_to_string(version),
         "api_token": prefs.api_token,
         "include_unstable": str(prefs.include_unstable)
         }
 
 
-def _encode_request_url(params: Dict[str, str]) -> str:
-    return f'{_update_check_url}?{urllib.parse.urlencode(params)}'
+def _get_batch_request_params(items: List[Tuple[str, 'AddonUpdatePreferences', Tuple[int, int, int]]]) -> Dict[str, str]:
+    import json
+    addons = []
+    for name, prefs, version in items:
+        params = _get_request_params(name, prefs, version)
+        del params["blender_version"]
+        addons.append(params)
+    return {
+        "blender_version": _version_tuple_to_string(bpy.app.version),
+        "addons": json.dumps(addons, separators=(",", ":"))
+        }
+
+
+def _get_check_cache_key(url: str, params: Dict[str, str]) -> str:
+    import hashlib, json
+    return hashlib.sha256(json.dumps([url, params], sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+def _encode_request_url(url: str, params: Dict[str, str]) -> str:
+    import urllib.parse
+    return f'{url}?{urllib.parse.urlencode(params)}'
 
 
 def _validate_version_tuple(version: Any) -> bool:
@@ -189,13 +220,466 @@ def _validate_version_tuple(version: Any) -> bool:
 
 
 def _check_update_filepath(filepath: str) -> Optional[str]:
+    import zipfile
     if not os.path.exists(filepath):
         return"Invalid update file path"
 
+    if os.path.isdir(filepath):
+        if not os.path.isfile(os.path.join(filepath, "__init__.py")):
+            return "Invalid update directory"
+        return None
+
     if not zipfile.is_zipfile(filepath):
         return "Invalid update file type"
 
 
+class _StreamExtractUnsupported(Exception):
+    pass
+
+
+class _ZipStreamExtractor:
+    # Extracts a zip archive as it is received, using the local file headers that precede
+    # each member rather than the central directory at the end of the file. Each member's
+    # CRC-32 is checked as it is written. Archives this cannot handle (encryption, methods
+    # other than stored/deflated, stored members of unknown size) raise
+    # _StreamExtractUnsupported so the caller can fall back to a regular download.
+
+    def __init__(self, root: str, package: str) -> None:
+        self._root = root
+        self._prefix = f'{package}/'
+        self._buffer = bytearray()
+        self._member: Optional[Dict[str, Any]] = None
+        self._descriptor = False
+        self._done = False
+        self.files = 0
+
+    def feed(self, data: bytes) -> None:
+        self._buffer += data
+        while not self._done and self._buffer and self._step():
+            pass
+
+    def abort(self) -> None:
+        member = self._member
+        self._member = None
+        if member is not None and member["file"] is not None:
+            member["file"].close()
+
+    def close(self) -> None:
+        if not self._done or self._member is not None:
+            raise RuntimeError("Update file is truncated")
+        if not os.path.isfile(os.path.join(self._root, "__init__.py")):
+            raise RuntimeError(f'Update file does not contain the {self._prefix[:-1]} addon')
+
+    def _step(self) -> bool:
+        if self._descriptor:
+            return self._read_descriptor()
+        if self._member is not None:
+            return self._read_data()
+        return self._read_header()
+
+    def _read_header(self) -> bool:
+        import struct, zlib
+        buffer = self._buffer
+        if len(buffer) < 4:
+            return False
+
+        signature = bytes(buffer[:4])
+        if signature in {b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06"}:
+            self._done = True
+            self._buffer = bytearray()
+            return False
+        if signature != b"PK\x03\x04":
+            raise RuntimeError("Invalid update file type")
+        if len(buffer) < 30:
+            return False
+
+        _, flags, method, _, _, crc, csize, usize, namelen, extralen = struct.unpack("<HHHHHIIIHH", buffer[4:30])
+        if len(buffer) < 30 + namelen + extralen:
+            return False
+
+        filename = bytes(buffer[30:30 + namelen]).decode("utf-8" if flags & 0x800 else "cp437")
+        extra = bytes(buffer[30 + namelen:30 + namelen + extralen])
+        del buffer[:30 + namelen + extralen]
+
+        zip64 = False
+        while len(extra) >= 4:
+            tag, size = struct.unpack("<HH", extra[:4])
+            if tag == 1:
+                zip64 = True
+                values = extra[4:4 + size]
+                if usize == 0xFFFFFFFF and len(values) >= 8:
+                    usize, values = struct.unpack("<Q", values[:8])[0], values[8:]
+                if csize == 0xFFFFFFFF and len(values) >= 8:
+                    csize = struct.unpack("<Q", values[:8])[0]
+            extra = extra[4 + size:]
+
+        descriptor = bool(flags & 0x08)
+        if flags & 0x01 or method not in {0, 8} or (descriptor and method == 0 and not csize):
+            raise _StreamExtractUnsupported(filename)
+
+        path = None
+        relpath = filename[len(self._prefix):].rstrip("/") if filename.startswith(self._prefix) else None
+        if relpath is None:
+            if not filename.startswith("__MACOSX/") and filename.rstrip("/") != self._prefix[:-1]:
+                raise RuntimeError("Update file must contain a single addon package")
+        elif relpath:
+            if not _is_safe_relative_path(relpath):
+                raise RuntimeError(f'Update file contains an invalid path "{filename}"')
+            path = os.path.join(self._root, *relpath.split("/"))
+
+        file = None
+        if path is not None:
+            if filename.endswith("/"):
+                os.makedirs(path, exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                file = open(path, "wb")
+                self.files += 1
+
+        self._member = {
+            "name": filename,
+            "file": file,
+            "method": method,
+            "crc": crc,
+            "usize": usize,
+            "remaining": csize if not descriptor or csize else -1,
+            "descriptor": descriptor,
+            "zip64": zip64,
+            "computed": 0,
+            "written": 0,
+            "decompressor": zlib.decompressobj(-15) if method == 8 else None,
+            }
+        return True
+
+    def _write(self, data: bytes) -> None:
+        import zlib
+        member = self._member
+        if data:
+            member["computed"] = zlib.crc32(data, member["computed"])
+            member["written"] += len(data)
+            if member["file"] is not None:
+                member["file"].write(data)
+
+    def _read_data(self) -> bool:
+        member = self._member
+        buffer = self._buffer
+        remaining = member["remaining"]
+        decompressor = member["decompressor"]
+
+        if remaining >= 0:
+            chunk = bytes(buffer[:remaining])
+            del buffer[:len(chunk)]
+            member["remaining"] = remaining = remaining - len(chunk)
+            self._write(decompressor.decompress(chunk) if decompressor else chunk)
+            finished = remaining == 0
+        else:
+            # Size unknown until the data descriptor, the deflate stream marks its own end
+            chunk = bytes(buffer)
+            buffer.clear()
+            self._write(decompressor.decompress(chunk))
+            finished = decompressor.eof
+            if finished:
+                buffer += decompressor.unused_data
+
+        if not finished:
+            return False
+
+        if decompressor is not None:
+            self._write(decompressor.flush())
+        if member["descriptor"]:
+            self._descriptor = True
+        else:
+            self._finish(member["crc"], member["usize"])
+        return True
+
+    def _read_descriptor(self) -> bool:
+        import struct
+        buffer = self._buffer
+        member = self._member
+        if len(buffer) < 4:
+            return False
+        offset = 4 if bytes(buffer[:4]) == b"PK\x07\x08" else 0
+        layout, size = ("<IQQ", 20) if member["zip64"] else ("<III", 12)
+        if len(buffer) < offset + size:
+            return False
+        crc, _, usize = struct.unpack(layout, buffer[offset:offset + size])
+        del buffer[:offset + size]
+        self._descriptor = False
+        self._finish(crc, usize)
+        return True
+
+    def _finish(self, crc: int, usize: int) -> None:
+        member = self._member
+        self._member = None
+        if member["file"] is not None:
+            member["file"].close()
+        if member["computed"] != crc or member["written"] != usize:
+            raise RuntimeError(f'Update file is corrupt (bad CRC-32 for "{member["name"]}")')
+
+
+def _get_archive_validation_cache_path() -> str:
+    return os.path.join(_get_cache_directory(), "validated.json")
+
+
+def _is_validated_update_archive(path: str, sha256: Optional[str]="") -> bool:
+    # Results are keyed by file hash. The stored path, size and mtime let a file that
+    # was already validated be recognised without hashing it again.
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    with _validation_cache_lock:
+        cache = _read_json_file(_get_archive_validation_cache_path())
+    entries = [cache.get(sha256)] if sha256 else cache.values()
+    return any(isinstance(entry, dict)
+               and entry.get("path") == path
+               and entry.get("size") == stat.st_size
+               and entry.get("mtime") == stat.st_mtime
+               for entry in entries)
+
+
+def _store_update_archive_validation(path: str, sha256: str) -> None:
+    stat = os.stat(path)
+    with _validation_cache_lock:
+        cache_path = _get_archive_validation_cache_path()
+        cache = _read_json_file(cache_path)
+        cache[sha256] = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime, "time": time.time()}
+        if len(cache) > 32:
+            cache = dict(sorted(cache.items(), key=lambda item: item[1].get("time", 0.0))[-32:])
+        with suppress(OSError):
+            _write_json_file(cache_path, cache)
+
+
+def _check_zip_members(path: str, infos: List['zipfile.ZipInfo']) -> None:
+    # Reading a member to the end makes zipfile compare its CRC-32
+    import zipfile
+    with zipfile.ZipFile(path) as archive:
+        for info in infos:
+            with archive.open(info) as file:
+                while file.read(1 << 20):
+                    pass
+
+
+def _validate_update_archive(path: str, name: str, sha256: Optional[str]="") -> str:
+    import zipfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    digest = sha256 or _hash_file(path)
+    if _is_validated_update_archive(path, digest):
+        return digest
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            infos = archive.infolist()
+            members = set(archive.namelist())
+    except (OSError, zipfile.BadZipFile) as err:
+        raise RuntimeError(f'Invalid update file ({err})')
+
+    packages = set()
+    for info in infos:
+        if info.filename.startswith("__MACOSX/"):
+            continue
+        filename = info.filename.rstrip("/")
+        if not _is_safe_relative_path(filename):
+            raise RuntimeError(f'Update file contains an invalid path "{info.filename}"')
+        packages.add(filename.split("/", 1)[0])
+
+    if len(packages) != 1:
+        raise RuntimeError("Update file must contain a single addon package")
+
+    if packages.pop() != name or f'{name}/__init__.py' not in members:
+        raise RuntimeError(f'Update file does not contain the {name} addon')
+
+    # Large members are checked concurrently, each worker using its own file handle.
+    # zlib releases the GIL while decompressing so this scales with the worker count.
+    large = [info for info in infos if not info.is_dir() and info.compress_size >= _validation_parallel_size]
+    small = [info for info in infos if not info.is_dir() and info.compress_size < _validation_parallel_size]
+
+    try:
+        if len(large) > 1:
+            workers = min(len(large) + 1, os.cpu_count() or 1, 4)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_check_zip_members, path, [info]) for info in large]
+                futures.append(executor.submit(_check_zip_members, path, small))
+                for future in futures:
+                    future.result()
+        else:
+            _check_zip_members(path, large + small)
+    except (OSError, EOFError, zipfile.BadZipFile, NotImplementedError) as err:
+        raise RuntimeError(f'Update file is corrupt ({err})')
+
+    _store_update_archive_validation(path, digest)
+    return digest
+
+
+def _file_matches_zip_member(path: str, info: 'zipfile.ZipInfo') -> bool:
+    import zlib
+    try:
+        if os.path.getsize(path) != info.file_size:
+            return False
+        crc = 0
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                crc = zlib.crc32(chunk, crc)
+        return crc == info.CRC
+    except OSError:
+        return False
+
+
+def _get_addon_staging_path(addon_path: str, suffix: str) -> str:
+    # Siblings of the addon directory are on the same filesystem, so they can be swapped
+    # in with a rename. The leading dot keeps Blender from listing them as addons.
+    parent, name = os.path.split(os.path.normpath(addon_path))
+    return os.path.join(parent, f'.{name}.{suffix}')
+
+
+def _stage_addon_update(filepath: str, addon_path: str, name: str) -> str:
+    # Extracts the addon package from the release archive into a sibling of the installed
+    # addon. Files whose size and CRC match the installed copy are hard linked instead
+    # of being written again. __init__.py is always written so its mtime changes and
+    # Blender reloads the module on enable.
+    import shutil, zipfile
+    staging = _get_addon_staging_path(addon_path, "staging")
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            prefix = f'{name}/'
+            members = [info for info in archive.infolist() if info.filename.startswith(prefix)]
+            if not any(info.filename == f'{prefix}__init__.py' for info in members):
+                raise RuntimeError(f'Update file does not contain the {name} addon')
+
+            for info in members:
+                relpath = info.filename[len(prefix):].rstrip("/")
+                if not relpath:
+                    continue
+                if not _is_safe_relative_path(relpath):
+                    raise RuntimeError(f'Invalid file path in update file "{info.filename}"')
+
+                target = os.path.join(staging, *relpath.split("/"))
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                current = os.path.join(addon_path, *relpath.split("/"))
+                if relpath != "__init__.py" and _file_matches_zip_member(current, info):
+                    try:
+                        os.link(current, target)
+                    except OSError:
+                        pass
+                    else:
+                        continue
+
+                with archive.open(info) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+
+        if not os.path.isfile(os.path.join(staging, "__init__.py")):
+            raise RuntimeError("Failed to extract update")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return staging
+
+
+def _swap_addon_directory(addon_path: str, staging: str) -> str:
+    previous = _get_addon_staging_path(addon_path, f'previous-{int(time.time())}')
+    os.replace(addon_path, previous)
+    try:
+        os.replace(staging, addon_path)
+    except BaseException:
+        os.replace(previous, addon_path)
+        raise
+    return previous
+
+
+def _restore_addon_directory(addon_path: str, previous: str) -> None:
+    import shutil
+    failed = _get_addon_staging_path(addon_path, "failed")
+    if os.path.exists(failed):
+        shutil.rmtree(failed, ignore_errors=True)
+    if os.path.exists(addon_path):
+        os.replace(addon_path, failed)
+    os.replace(previous, addon_path)
+    shutil.rmtree(failed, ignore_errors=True)
+
+
+def _get_addon_snapshot_path(addon_path: str, label: str) -> str:
+    root = _get_addon_staging_path(addon_path, "backups")
+    os.makedirs(root, exist_ok=True)
+    now = time.time()
+    name = f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}{int(now * 1000) % 1000:03d}-{_get_safe_filename(label)}'
+    path = os.path.join(root, name)
+    index = 1
+    while os.path.exists(path):
+        path = os.path.join(root, f'{name}-{index}')
+        index += 1
+    return path
+
+
+def _create_addon_snapshot(addon_path: str, label: str) -> str:
+    # Hard links every file of the addon into a new snapshot directory, which copies no
+    # data. Installs never modify files in place so the snapshot cannot change after.
+    import shutil
+    snapshot = _get_addon_snapshot_path(addon_path, label)
+    try:
+        for dirpath, _, filenames in os.walk(addon_path):
+            target = os.path.join(snapshot, os.path.relpath(dirpath, addon_path))
+            os.makedirs(target, exist_ok=True)
+            for filename in filenames:
+                source = os.path.join(dirpath, filename)
+                try:
+                    os.link(source, os.path.join(target, filename))
+                except OSError:
+                    shutil.copy2(source, os.path.join(target, filename))
+    except BaseException:
+        shutil.rmtree(snapshot, ignore_errors=True)
+        raise
+    _evict_addon_snapshots(addon_path)
+    return snapshot
+
+
+def _store_addon_snapshot(addon_path: str, previous: str, label: str) -> str:
+    snapshot = _get_addon_snapshot_path(addon_path, label)
+    os.replace(previous, snapshot)
+    _evict_addon_snapshots(addon_path)
+    return snapshot
+
+
+def _evict_addon_snapshots(addon_path: str) -> None:
+    # Keeps the newest snapshots while there are no more than _backup_limit of them and
+    # their combined size is within _backup_max_size. The newest one is always kept.
+    # Files hard linked between snapshots are only counted once.
+    import shutil
+    root = _get_addon_staging_path(addon_path, "backups")
+    with suppress(OSError):
+        snapshots = sorted((entry.path for entry in os.scandir(root) if entry.is_dir()), reverse=True)
+        seen = set()
+        size = 0
+        for index, snapshot in enumerate(snapshots):
+            for dirpath, _, filenames in os.walk(snapshot):
+                for filename in filenames:
+                    with suppress(OSError):
+                        stat = os.lstat(os.path.join(dirpath, filename))
+                        if (stat.st_dev, stat.st_ino) not in seen:
+                            seen.add((stat.st_dev, stat.st_ino))
+                            size += stat.st_size
+            if index and (index >= _backup_limit or (_backup_max_size and size > _backup_max_size)):
+                shutil.rmtree(snapshot, ignore_errors=True)
+
+
+def get_addon_snapshots(name: str) -> List[str]:
+    mod = _get_addon_module(name)
+    if mod is not None:
+        root = _get_addon_staging_path(os.path.dirname(mod.__file__), "backups")
+        with suppress(OSError):
+            return sorted((entry.path for entry in os.scandir(root) if entry.is_dir()), reverse=True)
+    return []
+
+
 def _cancel_with_error(op: Operator,
                        prefs: 'AddonUpdatePreferences',
                        error: Union[Exception, str]) -> Set[str]:
@@ -205,83 +689,1961 @@ def _cancel_with_error(op: Operator,
     return {'CANCELLED'}
 
 
-def _assign_update_check_response_params(prefs: 'AddonUpdatePreferences', data: Dict[str, str]) -> None:
+def _parse_release_size(value: Any) -> float:
+    try:
+        return max(float(value or 0), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _assign_update_check_response_params(name: str, prefs: 'AddonUpdatePreferences', data: Dict[str, Any]) -> None:
+    entry = _registry.get(name)
+    if entry is not None:
+        entry.release = data
     prefs.new_release_date = data.get("date", "")
+    prefs.new_release_hash = str(data.get("sha256", "") or "")
     prefs.new_release_notes = data.get("notes", "")
+    prefs.new_release_size = _parse_release_size(data.get("size"))
     prefs.new_release_url = data["url"]
     prefs.new_release_version = data.get("version", "")
     prefs.new_release_warning = data.get("warning", "")
     prefs.update_status = 'AVAILABLE'
 
 
-def _send_update_download_request(op: 'AddonUpdateDownload', url: str) -> None:
-    import urllib, urllib.request
-    try:
-        path, _ = urllib.request.urlretrieve(url)
-    except (urllib.error.URLError, urllib.error.HTTPError) as err:
-        op._result = err
-    else:
-        op._result = path
-    finally:
-        if not isinstance(op._result, (Exception, str)):
-            op._result = RuntimeError("Unknown error. Contact addon maintainer")
+def add_trace_callback(callback: Callable[[Dict[str, Any]], None]) -> None:
+    # Called with each finished span on the thread that finished it
+    if callback not in _trace_callbacks:
+        _trace_callbacks.append(callback)
+
+
+def remove_trace_callback(callback: Callable[[Dict[str, Any]], None]) -> None:
+    with suppress(ValueError):
+        _trace_callbacks.remove(callback)
+
+
+def _new_trace_id() -> str:
+    global _trace_count
+    with _trace_lock:
+        _trace_count += 1
+        count = _trace_count
+    return f'{os.getpid():x}-{int(time.time()):x}-{count}'
+
+
+def _emit_trace(record: Dict[str, Any]) -> None:
+    for callback in list(_trace_callbacks):
+        try:
+            callback(record)
+        except Exception as err:
+            print(err)
+
+    path = _trace_log
+    if path:
+        import json
+        line = json.dumps(record, default=str)
+        with _trace_lock, suppress(OSError):
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(f'{line}\n')
+
+
+class _TraceSpan:
+    # Times a phase of the update pipeline. The span is always timed since handlers use
+    # the duration themselves, but only emitted when a log or callback is set.
+
+    def __init__(self, name: str, trace: Optional[str]="", **attrs: Any) -> None:
+        self.name = name
+        self.trace = trace
+        self.attrs = attrs
+        self.bytes = 0
+        self.duration = 0.0
+        self._time = 0.0
+        self._start = 0.0
+
+    def __enter__(self) -> '_TraceSpan':
+        self._time = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], _: Any) -> None:
+        self.duration = time.perf_counter() - self._start
+        if _trace_log or _trace_callbacks:
+            if exc is None:
+                outcome = "ok"
+            elif isinstance(exc, _OperationCancelled):
+                outcome = "cancelled"
+            else:
+                outcome = "error"
+            record = {"trace": self.trace,
+                      "span": self.name,
+                      "time": self._time,
+                      "duration_ms": self.duration * 1000.0,
+                      "outcome": outcome}
+            if self.bytes:
+                record["bytes"] = self.bytes
+            if exc is not None:
+                record["error"] = str(exc)
+            record.update(self.attrs)
+            _emit_trace(record)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class _PooledResponse:
+
+    def __init__(self,
+                 pool: '_ConnectionPool',
+                 key: Tuple[str, str, int, str],
+                 conn: Any,
+                 resp: Any,
+                 url: str,
+                 trace: Optional[str]="") -> None:
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._span = _TraceSpan("body_read", trace, url=url, status=resp.status).__enter__()
+        self._encoding = (resp.getheader("Content-Encoding") or "").strip().lower()
+        self._decoder = None
+        self._decoded = 0
+        self.url = url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+
+    def __enter__(self) -> '_PooledResponse':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def getheader(self, name: str, default: Optional[str]=None) -> Optional[str]:
+        return self._resp.getheader(name, default)
+
+    def read(self, amt: Optional[int]=None) -> bytes:
+        # Bodies sent with gzip or deflate encoding are decompressed as they are read,
+        # at most amt bytes of input at a time. Only requests that sent Accept-Encoding
+        # get them, http.client asks for identity otherwise.
+        if self._encoding not in {"gzip", "x-gzip", "deflate"}:
+            data = self._resp.read(amt)
+            self._span.bytes += len(data)
+            return data
+
+        while True:
+            decoder = self._decoder
+            if decoder is not None and decoder.unconsumed_tail:
+                data = decoder.decompress(decoder.unconsumed_tail, amt or 0)
+            else:
+                raw = self._resp.read(amt)
+                self._span.bytes += len(raw)
+                if decoder is None:
+                    if not raw:
+                        return b""
+                    decoder = self._decoder = self._create_decoder(raw)
+                data = decoder.decompress(raw, amt or 0) if raw else decoder.flush()
+                if not raw:
+                    self._decoded += len(data)
+                    return data
+            if data:
+                self._decoded += len(data)
+                return data
+
+    def _create_decoder(self, data: bytes) -> Any:
+        import zlib
+        if self._encoding != "deflate":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # Deflate should be zlib wrapped but some servers send a raw stream
+        if len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+            return zlib.decompressobj(zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def close(self) -> None:
+        conn = self._conn
+        if conn is not None:
+            self._conn = None
+            # A connection can only be reused once its response has been read to the end
+            resp = self._resp
+            reusable = resp.isclosed() and not resp.will_close
+            self._span.set(complete=resp.isclosed())
+            if self._decoder is not None:
+                self._span.set(encoding=self._encoding, decoded_bytes=self._decoded)
+            self._span.__exit__(None, None, None)
+            resp.close()
+            self._pool.release(self._key, conn, reusable)
+
+
+class _ConnectionPool:
+
+    def __init__(self, max_per_host: int=8, idle_timeout: float=30.0) -> None:
+        self._max_per_host = max_per_host
+        self._idle_timeout = idle_timeout
+        self._idle: Dict[Tuple[str, str, int, str], List[Tuple[Any, float]]] = {}
+        self._active: Dict[Tuple[str, str, int, str], int] = {}
+        self._lock = threading.Condition()
+        self._ssl_context = None
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "discarded": 0, "requests": 0}
+
+    def _evict(self, now: float) -> None:
+        for key, items in list(self._idle.items()):
+            keep = []
+            for conn, since in items:
+                if now - since > self._idle_timeout:
+                    conn.close()
+                    self.stats["evicted"] += 1
+                else:
+                    keep.append((conn, since))
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+
+    def _connect(self, key: Tuple[str, str, int, str], timeout: float) -> Any:
+        import http.client
+        scheme, host, port, proxy = key
+        if proxy:
+            import urllib.parse
+            parts = urllib.parse.urlsplit(proxy)
+            address = (parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        else:
+            address = (host, port)
+
+        if scheme == "https" or (proxy and proxy.startswith("https:")):
+            if self._ssl_context is None:
+                import ssl
+                self._ssl_context = ssl.create_default_context()
+            conn = http.client.HTTPSConnection(*address, timeout=timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(*address, timeout=timeout)
+
+        if proxy and scheme == "https":
+            conn.set_tunnel(host, port, headers=_get_proxy_headers(proxy))
+
+        self.stats["created"] += 1
+        return conn
+
+    def acquire(self, key: Tuple[str, str, int, str], timeout: float) -> Tuple[Any, bool]:
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._evict(now)
+                if self._active.get(key, 0) < self._max_per_host:
+                    break
+                if now >= deadline or not self._lock.wait(deadline - now):
+                    raise TimeoutError(f'Timed out waiting for a connection to {key[1]}')
+
+            self._active[key] = self._active.get(key, 0) + 1
+            idle = self._idle.get(key)
+            if idle:
+                conn, _ = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                self.stats["reused"] += 1
+                return conn, True
+
+        try:
+            return self._connect(key, timeout), False
+        except BaseException:
+            self.release(key, None, False)
+            raise
+
+    def release(self, key: Tuple[str, str, int, str], conn: Any, reusable: bool) -> None:
+        with self._lock:
+            self._active[key] = max(self._active.get(key, 0) - 1, 0)
+            if conn is not None:
+                if reusable and conn.sock is not None:
+                    self._idle.setdefault(key, []).append((conn, time.monotonic()))
+                else:
+                    conn.close()
+                    self.stats["discarded"] += 1
+            self._lock.notify()
+
+    def clear(self) -> None:
+        with self._lock:
+            for items in self._idle.values():
+                for conn, _ in items:
+                    conn.close()
+            self._idle.clear()
+
+    def urlopen(self,
+                url: str,
+                headers: Optional[Dict[str, str]]=None,
+                timeout: float=60.0,
+                trace: Optional[str]="",
+                connect_timeout: Optional[float]=None) -> _PooledResponse:
+        import http.client, io, urllib.error, urllib.parse
+        headers = dict(headers or {})
+        headers.setdefault("User-Agent", f'Blender/{_version_tuple_to_string(bpy.app.version)}')
+
+        for _ in range(10):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in {"http", "https"}:
+                raise urllib.error.URLError(f'Unsupported URL scheme "{parts.scheme}"')
+
+            host = parts.hostname or ""
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            proxy = _get_proxy(parts.scheme, host)
+            key = (parts.scheme, host, port, proxy)
+
+            target = parts.path or "/"
+            if parts.query:
+                target = f'{target}?{parts.query}'
+
+            request_headers = headers
+            if proxy and parts.scheme == "http":
+                target = url
+                request_headers = dict(headers, **_get_proxy_headers(proxy))
+
+            # A pooled connection may have been closed by the server while idle, in which
+            # case the request is retried once on a new connection.
+            for attempt in range(2):
+                conn, reused = self.acquire(key, timeout)
+                try:
+                    if conn.sock is None:
+                        with _TraceSpan("connect", trace, host=host, port=port, proxy=bool(proxy)):
+                            conn.timeout = min(connect_timeout or timeout, timeout)
+                            conn.connect()
+                            conn.timeout = timeout
+                            conn.sock.settimeout(timeout)
+                    with _TraceSpan("first_byte", trace, url=url, reused=reused) as span:
+                        conn.request("GET", target, headers=request_headers)
+                        resp = conn.getresponse()
+                        span.set(status=resp.status)
+                except (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine) as err:
+                    self.release(key, conn, False)
+                    if reused and attempt == 0:
+                        continue
+                    raise urllib.error.URLError(err)
+                except OSError as err:
+                    self.release(key, conn, False)
+                    raise urllib.error.URLError(err)
+                except BaseException:
+                    self.release(key, conn, False)
+                    raise
+                break
+
+            with self._lock:
+                self.stats["requests"] += 1
+
+            response = _PooledResponse(self, key, conn, resp, url, trace)
+            status = resp.status
+
+            if status in {301, 302, 303, 307, 308} and resp.getheader("Location"):
+                location = urllib.parse.urljoin(url, resp.getheader("Location"))
+                with response:
+                    response.read()
+                url = location
+                continue
+
+            if status < 200 or status >= 300:
+                with response:
+                    body = response.read(1 << 16)
+                raise urllib.error.HTTPError(url, status, resp.reason, resp.headers, io.BytesIO(body))
+
+            return response
+
+        raise urllib.error.URLError("Too many redirects")
+
+
+def _get_proxy(scheme: str, host: str) -> str:
+    import urllib.request
+    proxy = urllib.request.getproxies().get(scheme, "")
+    if proxy and urllib.request.proxy_bypass(host):
+        return ""
+    if proxy and "://" not in proxy:
+        proxy = f'http://{proxy}'
+    return proxy
+
+
+def _get_proxy_headers(proxy: str) -> Dict[str, str]:
+    import base64, urllib.parse
+    parts = urllib.parse.urlsplit(proxy)
+    if parts.username:
+        credentials = f'{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or "")}'
+        return {"Proxy-Authorization": f'Basic {base64.b64encode(credentials.encode()).decode()}'}
+    return {}
+
+
+_connection_pool = _ConnectionPool()
+
+
+def _open_url(url: str,
+              headers: Optional[Dict[str, str]]=None,
+              timeout: float=60.0,
+              trace: Optional[str]="",
+              connect_timeout: Optional[float]=None) -> Any:
+    return _connection_pool.urlopen(url, headers, timeout, trace, connect_timeout)
+
+
+def connection_pool_stats() -> Dict[str, int]:
+    return dict(_connection_pool.stats)
+
+
+def _get_mirror_origin(url: str) -> str:
+    import urllib.parse
+    parts = urllib.parse.urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'.lower()
+
+
+def _get_mirror_stats() -> Dict[str, Dict[str, float]]:
+    # Latency per mirror origin, kept across sessions in the cache directory
+    global _mirror_stats
+    if _mirror_stats is None:
+        _mirror_stats = _read_json_file(os.path.join(_get_cache_directory(), "mirrors.json"))
+    return _mirror_stats
+
+
+def _record_mirror_result(url: str, latency: Optional[float]) -> None:
+    with _mirror_lock:
+        stats = _get_mirror_stats()
+        entry = stats.setdefault(_get_mirror_origin(url), {})
+        if latency is None:
+            entry["failures"] = entry.get("failures", 0) + 1
+            entry["failed"] = time.time()
+        else:
+            previous = entry.get("latency")
+            entry["latency"] = latency if previous is None else previous * 0.7 + latency * 0.3
+            entry["failures"] = 0
+            entry.pop("failed", None)
+        with suppress(OSError, TypeError, ValueError):
+            _write_json_file(os.path.join(_get_cache_directory(), "mirrors.json"), stats)
+
+
+def _order_mirrors(urls: List[str]) -> List[str]:
+    # Mirrors that answered before come first, fastest first, then ones never tried in
+    # the order given. Mirrors that failed recently come last.
+    with _mirror_lock:
+        stats = dict(_get_mirror_stats())
+    now = time.time()
+
+    def key(item: Tuple[int, str]) -> Tuple[int, float]:
+        index, url = item
+        entry = stats.get(_get_mirror_origin(url), {})
+        if now - entry.get("failed", 0.0) < _mirror_retry_after:
+            return (2, index)
+        latency = entry.get("latency")
+        if latency is None:
+            return (1, index)
+        return (0, latency)
+
+    return [url for _, url in sorted(enumerate(dict.fromkeys(urls)), key=key)]
+
+
+def mirror_stats() -> Dict[str, Dict[str, float]]:
+    with _mirror_lock:
+        return {origin: dict(entry) for origin, entry in _get_mirror_stats().items()}
+
+
+def _open_mirrors(urls: List[str],
+                  headers: Optional[Dict[str, str]]=None,
+                  timeout: float=60.0,
+                  trace: Optional[str]="",
+                  cancelled: Optional[Callable[[], bool]]=None) -> Tuple[Any, str]:
+    # Requests the best mirror first and starts the next whenever _mirror_stagger passes
+    # without an answer, with up to _mirror_race_count in flight. A mirror that fails is
+    # replaced by the next one. The first answer wins and later ones are closed.
+    #
+    # The attempts run on their own short lived threads rather than the shared executor.
+    # The caller is itself a handler occupying one of its bounded workers, so attempts
+    # queued behind other handlers could stall, or deadlock once every worker is waiting
+    # on its own race. Instead they connect with _mirror_connect_timeout and are stopped
+    # through the race's event when the caller is cancelled, has its answer, or the
+    # module is unregistered.
+    import queue, urllib.error
+    candidates = _order_mirrors(urls)
+    if len(candidates) == 1:
+        return _open_url(candidates[0], headers, timeout, trace), candidates[0]
+
+    results = queue.SimpleQueue()
+    lock = threading.Lock()
+    stop = threading.Event()
+    answers = []
+
+    def attempt(url: str) -> None:
+        start = time.perf_counter()
+        resp = error = None
+        try:
+            if not stop.is_set():
+                resp = _open_url(url, headers, timeout, trace, _mirror_connect_timeout)
+        except Exception as err:
+            error = err
+        if resp is None and error is None:
+            return
+        # Not modified and range not satisfiable are answers the caller handles
+        answered = resp is not None or (isinstance(error, urllib.error.HTTPError) and error.code in {304, 416})
+        _record_mirror_result(url, time.perf_counter() - start if answered else None)
+        with lock:
+            first = answered and not answers and not stop.is_set()
+            if first:
+                answers.append(url)
+        if stop.is_set() or (answered and not first):
+            if resp is not None:
+                resp.close()
+            return
+        results.put((url, resp, error, answered))
+
+    _mirror_races.add(stop)
+    try:
+        index = active = 0
+        started = 0.0
+        error = None
+        while True:
+            if stop.is_set() or (cancelled is not None and cancelled()):
+                raise _OperationCancelled()
+
+            now = time.monotonic()
+            racing = index < len(candidates) and active < _mirror_race_count
+            if racing and (not active or now - started >= _mirror_stagger):
+                threading.Thread(target=attempt, args=(candidates[index],), daemon=True).start()
+                index += 1
+                active += 1
+                started = now
+                racing = index < len(candidates) and active < _mirror_race_count
+
+            wait = max(started + _mirror_stagger - now, 0.0) if racing else 0.1
+            try:
+                url, resp, err, answered = results.get(timeout=min(wait, 0.1))
+            except queue.Empty:
+                continue
+
+            active -= 1
+            if answered:
+                if resp is None:
+                    raise err
+                return resp, url
+
+            # A failed mirror is replaced straight away
+            error = err
+            started = 0.0
+            if index >= len(candidates) and not active:
+                raise error
+    finally:
+        with lock:
+            stop.set()
+        _mirror_races.discard(stop)
+
+
+def _cancel_mirror_races() -> None:
+    for stop in list(_mirror_races):
+        stop.set()
+
+
+class _TokenBucket:
+
+    # Tokens are bytes, added at rate per second up to one second's worth. Taking more
+    # than is available puts the bucket in debt and returns how long to wait it out.
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self._tokens = rate
+        self._time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._time) * self.rate, self.rate) - amount
+            self._time = now
+            return -self._tokens / self.rate if self._tokens < 0.0 else 0.0
+
+
+class _OperationCancelled(Exception):
+
+    def __init__(self) -> None:
+        super().__init__("Cancelled")
+
+
+def _submit_worker(handler: Any) -> Any:
+    # All handlers share one bounded executor, started on first use. Download segments
+    # use their own executor since a download waiting on segments queued behind it in
+    # this one could never finish.
+    global _worker_executor
+    from concurrent.futures import ThreadPoolExecutor
+    with _worker_executor_lock:
+        if _worker_executor is None:
+            _worker_executor = ThreadPoolExecutor(max_workers=_worker_max, thread_name_prefix="addon_update")
+        _worker_handlers.add(handler)
+        return _worker_executor.submit(handler._run, handler)
+
+
+def _release_worker(handler: Any) -> None:
+    with _worker_executor_lock:
+        _worker_handlers.discard(handler)
+
+
+def _shutdown_workers() -> None:
+    global _worker_executor
+    with _worker_executor_lock:
+        executor, _worker_executor = _worker_executor, None
+        handlers = list(_worker_handlers)
+    for handler in handlers:
+        handler.cancel()
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def worker_stats() -> Dict[str, int]:
+    with _worker_executor_lock:
+        return {"max_workers": _worker_max,
+                "started": int(_worker_executor is not None),
+                "active": len(_worker_handlers)}
+
+
+def _cancel_addon_operation(name: str) -> None:
+    handler = _addon_operations.pop(name, None)
+    if handler is not None:
+        handler.cancel()
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024.0 or unit == "GB":
+            return f'{size:.0f} {unit}' if unit == "B" else f'{size:.1f} {unit}'
+        size /= 1024.0
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f'{seconds}s'
+    if seconds < 3600:
+        return f'{seconds // 60}m {seconds % 60:02d}s'
+    return f'{seconds // 3600}h {seconds % 3600 // 60:02d}m'
+
+
+def _resolve_operator_function(name: str, op: Type[Operator]) -> Optional[Callable]:
+    tokens = _get_operator_idname(name, op).split(".")
+    if len(tokens) == 2:
+        ns = getattr(bpy.ops, tokens[0], None)
+        if ns:
+            return getattr(ns, tokens[1], None)
+
+
+def _reset_update_status(prefs: 'AddonUpdatePreferences') -> None:
+    _download_cache_pinned.pop(prefs.bl_idname, None)
+    prefs.new_release_date = ""
+    prefs.new_release_hash = ""
+    prefs.new_release_notes = ""
+    prefs.new_release_path = ""
+    prefs.new_release_size = 0.0
+    prefs.new_release_url = ""
+    prefs.new_release_version = ""
+    prefs.new_release_warning = ""
+    prefs.update_error = ""
+    prefs.update_status = 'NONE'
+    _reset_download_progress(prefs)
+
+
+def _reset_download_progress(prefs: 'AddonUpdatePreferences') -> None:
+    prefs.update_bytes_received = 0.0
+    prefs.update_bytes_total = 0.0
+    prefs.update_throughput = 0.0
+    prefs.update_eta = 0.0
+
+
+def _tag_preferences_redraw() -> None:
+    with suppress(Exception):
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type == 'PREFERENCES':
+                    area.tag_redraw()
+
+
+def _main_thread_callback(func: Callable[..., None], *args: Any, final: Optional[bool]=True) -> Callable[[Any], None]:
+    # Handler callbacks are called on worker threads. The returned callback queues
+    # func(*args, handler) to be called on the main thread instead. The dispatcher keeps
+    # running until every final callback created here has been called.
+    global _event_pending, _event_queue
+    if _event_queue is None:
+        import queue
+        _event_queue = queue.SimpleQueue()
+    if final:
+        _event_pending += 1
+        _start_event_dispatch()
+    queue_ = _event_queue
+    def callback(handler: Any) -> None:
+        queue_.put((func, args + (handler,), final))
+    return callback
+
+
+def _start_event_dispatch() -> None:
+    global _event_interval
+    _event_interval = _event_interval_min
+    if not bpy.app.timers.is_registered(_dispatch_events):
+        bpy.app.timers.register(_dispatch_events, first_interval=_event_interval, persistent=True)
+
+
+def _stop_event_dispatch() -> None:
+    global _event_pending
+    if bpy.app.timers.is_registered(_dispatch_events):
+        bpy.app.timers.unregister(_dispatch_events)
+    _event_pending = 0
+    _event_spinners.clear()
+    while _event_queue is not None and not _event_queue.empty():
+        _event_queue.get_nowait()
+
+
+def _dispatch_events() -> Optional[float]:
+    # Backs off while nothing arrives and only redraws when a callback ran or a busy
+    # indicator moved to its next frame
+    global _event_pending, _event_interval
+    handled = False
+    while _event_queue is not None and not _event_queue.empty():
+        func, args, final = _event_queue.get_nowait()
+        handled = True
+        if final:
+            _event_pending -= 1
+        try:
+            func(*args)
+        except Exception as err:
+            print(err)
+
+    redraw = handled
+    now = time.monotonic()
+    for name, start in list(_event_spinners.items()):
+        prefs = _get_addon_preferences(name)
+        if prefs is None:
+            del _event_spinners[name]
+        elif int((now - start) * 4) != int(prefs.update_progress * 4):
+            prefs.update_progress = now - start
+            redraw = True
+
+    if redraw:
+        _tag_preferences_redraw()
+
+    if _event_pending <= 0 and not _event_spinners:
+        _event_pending = 0
+        return None
+
+    _event_interval = _event_interval_min if handled else min(_event_interval * 2, _event_interval_max)
+    return min(_event_interval, 0.25) if _event_spinners else _event_interval
+
+
+def _start_spinner(name: str) -> None:
+    _event_spinners[name] = time.monotonic()
+    _start_event_dispatch()
+
+
+def _stop_spinner(name: str) -> None:
+    _event_spinners.pop(name, None)
+    prefs = _get_addon_preferences(name)
+    if prefs is not None:
+        prefs.update_progress = 0.0
+
+
+def _get_default_cache_directory() -> str:
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        root = os.path.expanduser("~/Library/Caches")
+    else:
+        root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(root, "bl_addon_update_strategy")
+
+
+def _get_cache_directory(*names: str) -> str:
+    path = os.path.join(_cache_directory or _get_default_cache_directory(), *names)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_safe_filename(name: str) -> str:
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in name).strip(".") or "_"
+
+
+def _read_json_file(path: str) -> Dict[str, Any]:
+    import json
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_json_file(path: str, data: Dict[str, Any]) -> None:
+    import json
+    temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(temp, path)
+
+
+def _get_download_key(url: str) -> str:
+    import urllib.parse
+    parts = urllib.parse.urlsplit(url)
+    return _get_safe_filename(f'{parts.netloc}{parts.path}')[-120:]
+
+
+def _hash_file(path: str, chunk_size: int=1 << 20) -> str:
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _FileLock:
+
+    # Held by creating the lock file with O_EXCL, so it works between processes on one
+    # host and on shared file systems. With heartbeat the holder touches the file while
+    # it holds it. A lock not touched for stale_after seconds, or owned by a process on
+    # this host that no longer exists, was left by a crashed process and is broken.
+
+    def __init__(self, path: str, stale_after: Optional[float]=None, heartbeat: Optional[bool]=True) -> None:
+        self.path = path
+        self.stale_after = _lock_stale_after if stale_after is None else stale_after
+        self.heartbeat = heartbeat
+        self._token = ""
+        self._stop: Optional[threading.Event] = None
+
+    @property
+    def locked(self) -> bool:
+        return bool(self._token)
+
+    def __enter__(self) -> '_FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.release()
+
+    def acquire(self, timeout: Optional[float]=None, poll: Optional[Callable[[], bool]]=None) -> bool:
+        # Waits until the lock is acquired or timeout expires. poll is called between
+        # attempts and gives up waiting by returning True.
+        end = None if timeout is None else time.monotonic() + timeout
+        interval = 0.02
+        while not self._try_acquire():
+            if poll is not None and poll():
+                return False
+            if end is not None and time.monotonic() >= end:
+                return False
+            time.sleep(interval)
+            interval = min(interval * 2.0, _lock_poll_interval)
+        return True
+
+    def release(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+        if self._token and self._read_owner().get("token") == self._token:
+            with suppress(OSError):
+                os.remove(self.path)
+        self._token = ""
+
+    def _try_acquire(self) -> bool:
+        import json, socket
+        owner = {"token": f'{os.getpid()}-{threading.get_ident()}-{time.time_ns()}',
+                 "host": socket.gethostname(),
+                 "pid": os.getpid(),
+                 "time": time.time()}
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return self._break_stale() and self._try_acquire()
+        try:
+            os.write(fd, json.dumps(owner).encode("utf-8"))
+        finally:
+            os.close(fd)
+        self._token = owner["token"]
+        if self.heartbeat:
+            self._stop = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(self._stop,), daemon=True).start()
+        return True
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        while not stop.wait(self.stale_after / 4.0):
+            with suppress(OSError):
+                os.utime(self.path)
+
+    def _read_owner(self, path: Optional[str]=None) -> Dict[str, Any]:
+        return _read_json_file(path or self.path)
+
+    def _is_stale(self, owner: Dict[str, Any], mtime: float) -> bool:
+        import socket
+        if time.time() - mtime > self.stale_after:
+            return True
+        pid = owner.get("pid")
+        # Signal 0 only checks the process exists, except on Windows where it would kill it
+        if sys.platform == "win32" or not isinstance(pid, int) or owner.get("host") != socket.gethostname():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass
+        return False
+
+    def _break_stale(self) -> bool:
+        # The lock is renamed away before it is removed so only one process breaks it.
+        # A lock that was released and taken again in the meantime is put back.
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        owner = self._read_owner()
+        if not self._is_stale(owner, mtime):
+            return False
+        stale = f'{self.path}.{os.getpid()}.{threading.get_ident()}.stale'
+        try:
+            os.rename(self.path, stale)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        if self._read_owner(stale).get("token") != owner.get("token"):
+            with suppress(OSError):
+                os.link(stale, self.path)
+        with suppress(OSError):
+            os.remove(stale)
+        return True
+
+
+def _get_download_lock(key: str) -> _FileLock:
+    return _FileLock(os.path.join(_get_cache_directory("locks"), f'{key}.lock'))
+
+
+def _get_download_cache_lock() -> _FileLock:
+    # Guards downloads/index.json between processes sharing the cache directory. It is
+    # only held for a read and write of the index, so needs no heartbeat and is
+    # considered stale sooner.
+    return _FileLock(os.path.join(_get_cache_directory("locks"), "download-cache.lock"), 10.0, False)
+
+
+def _get_download_cache_index_path() -> str:
+    return os.path.join(_get_cache_directory("downloads"), "index.json")
+
+
+def _lookup_download_cache(sha256: str, key: str, size: int) -> Tuple[str, str]:
+    # Release archives are stored as downloads/<sha256>.zip. Without a hash from the
+    # update server a release is found by the keys (addon and version) it was stored
+    # under. Returns the path and hash of the cached file, or empty strings.
+    if _download_cache_size <= 0 or not (sha256 or key):
+        return "", ""
+    with _download_cache_lock:
+        # The index is replaced atomically, so other processes only need to be locked
+        # out when it is changed
+        index_path = _get_download_cache_index_path()
+        index = _read_json_file(index_path)
+        digest = sha256
+        if not digest:
+            digest = next((digest for digest, entry in index.items()
+                           if isinstance(entry, dict) and key in entry.get("keys", ())), "")
+        entry = index.get(digest)
+        if not isinstance(entry, dict):
+            _download_cache_stats["misses"] += 1
+            return "", ""
+
+        path = os.path.join(os.path.dirname(index_path), f'{digest}.zip')
+
+        def is_valid(entry: Any) -> bool:
+            try:
+                actual = os.path.getsize(path)
+            except OSError:
+                return False
+            return isinstance(entry, dict) and actual == entry.get("size") and actual == (size or actual)
+
+        # Recency only needs to be roughly right for eviction, so hits on an archive
+        # used in the last minute do not rewrite the index
+        valid = is_valid(entry)
+        now = time.time()
+        if not valid or now - entry.get("time", 0.0) > 60.0:
+            with _get_download_cache_lock():
+                index = _read_json_file(index_path)
+                entry = index.get(digest)
+                valid = is_valid(entry)
+                if valid:
+                    entry["time"] = now
+                elif entry is not None:
+                    del index[digest]
+                    with suppress(OSError):
+                        os.remove(path)
+                with suppress(OSError):
+                    _write_json_file(index_path, index)
+
+        if not valid:
+            _download_cache_stats["misses"] += 1
+            return "", ""
+        _download_cache_stats["hits"] += 1
+        return path, digest
+
+
+def _store_download_cache(path: str, sha256: str, key: str, url: str) -> str:
+    # Moves a completed download into the cache and returns its new path, or the
+    # original path when it is not cached
+    if _download_cache_size <= 0 or not sha256:
+        return path
+    target = path
+    try:
+        size = os.path.getsize(path)
+        if size > _download_cache_size:
+            return path
+        with _download_cache_lock, _get_download_cache_lock():
+            index_path = _get_download_cache_index_path()
+            target = os.path.join(os.path.dirname(index_path), f'{sha256}.zip')
+            os.replace(path, target)
+            index = _read_json_file(index_path)
+            entry = index.get(sha256)
+            keys = [value for value in entry.get("keys", ()) if value != key] if isinstance(entry, dict) else []
+            if key:
+                keys.append(key)
+            index[sha256] = {"size": size, "keys": keys[-8:], "url": url, "time": time.time()}
+            _evict_download_cache(index, sha256)
+            _write_json_file(index_path, index)
+    except OSError as err:
+        print(err)
+        return path if os.path.exists(path) else target
+    return target
+
+
+def _evict_download_cache(index: Dict[str, Any], keep: str) -> None:
+    # Removes the least recently used archives until the cache fits _download_cache_size.
+    # Archives of releases waiting to be installed or prefetched are never removed.
+    directory = _get_cache_directory("downloads")
+    pinned = {os.path.normcase(path) for path in list(_download_cache_pinned.values())}
+    pinned.update(os.path.normcase(path) for _, path in list(_prefetched_releases.values()))
+    entries = sorted(((entry.get("time", 0.0), digest, entry.get("size", 0))
+                      for digest, entry in index.items() if isinstance(entry, dict)), reverse=True)
+    total = 0
+    for _, digest, size in entries:
+        total += size
+        path = os.path.join(directory, f'{digest}.zip')
+        if total > _download_cache_size and digest != keep and os.path.normcase(path) not in pinned:
+            total -= size
+            del index[digest]
+            with suppress(OSError):
+                os.remove(path)
+            _download_cache_stats["evictions"] += 1
+
+
+def download_cache_stats() -> Dict[str, int]:
+    with _download_cache_lock, _get_download_cache_lock():
+        index = _read_json_file(_get_download_cache_index_path())
+        entries = [entry for entry in index.values() if isinstance(entry, dict)]
+        return dict(_download_cache_stats,
+                    entries=len(entries),
+                    size=sum(entry.get("size", 0) for entry in entries),
+                    max_size=_download_cache_size)
+
+
+def _iter_addon_files(root: str) -> Iterator[Tuple[str, str]]:
+    # Yields (relative posix path, absolute path) for every file of an installed addon,
+    # skipping Python caches which are not part of a release.
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+        for filename in filenames:
+            if not filename.endswith((".pyc", ".pyo")):
+                path = os.path.join(dirpath, filename)
+                yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+
+def _is_safe_relative_path(path: str) -> bool:
+    parts = path.replace("\\", "/").split("/")
+    return bool(path) and not path.startswith("/") and ":" not in parts[0] and ".." not in parts and "" not in parts
+
+
+def _parse_release_manifest(manifest: Any) -> Dict[str, Tuple[str, int]]:
+    # The manifest maps relative file paths to their SHA-256, either as a plain hex
+    # string or as {"sha256": ..., "size": ...}.
+    files = manifest.get("files") if isinstance(manifest, dict) else None
+    if not isinstance(files, dict) or not files:
+        raise ValueError("Invalid update manifest")
+
+    result = {}
+    for path, value in files.items():
+        if isinstance(value, dict):
+            digest, size = value.get("sha256", ""), value.get("size", 0)
+        else:
+            digest, size = value, 0
+        if not _is_safe_relative_path(path) or not isinstance(digest, str) or len(digest) != 64:
+            raise ValueError(f'Invalid update manifest entry "{path}"')
+        result[path] = (digest.lower(), int(size or 0))
+    return result
+
+
+def _parse_content_range(value: Optional[str]) -> Tuple[int, int]:
+    # "bytes <start>-<end>/<total>" -> (start, total). Total is 0 when the server sends "*"
+    try:
+        unit, spec = value.split(" ", 1)
+        span, total = spec.split("/", 1)
+        if unit.strip().lower() != "bytes":
+            raise ValueError(value)
+        return int(span.split("-", 1)[0]), 0 if total.strip() == "*" else int(total)
+    except (AttributeError, ValueError):
+        return -1, 0
+
+
+class AddonUpdateCheckHandler:
+
+    def __init__(self,
+                 url: str,
+                 callback: Optional[Callable[['AddonUpdateCheckHandler'], None]]=None,
+                 cache_key: Optional[str]="",
+                 max_age: Optional[float]=0.0,
+                 timeout: Optional[float]=None,
+                 trace: Optional[str]="",
+                 mirrors: Optional[List[str]]=None) -> None:
+        self._url = url
+        self._mirrors = [mirror for mirror in mirrors or () if isinstance(mirror, str) and mirror]
+        self._trace = trace or _new_trace_id()
+        self._future = None
+        self._result = None
+        self._callback = callback
+        self._cache_key = cache_key
+        self._max_age = max_age or 0.0
+        self._timeout = float(timeout or _check_timeout or 60.0)
+        self._cancelled = False
+        self._cached = False
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None
+
+    @property
+    def complete(self) -> bool:
+        return self._result is not None
+
+    @property
+    def data(self) -> Optional[Dict[str, str]]:
+        result = self._result
+        if isinstance(result, dict):
+            return result
+
+    @property
+    def result(self) -> Optional[Union[Dict[str, str], Exception]]:
+        return self._result
+
+    @property
+    def error(self) -> Optional[Exception]:
+        result = self._result
+        if isinstance(result, Exception):
+            return result
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def cached(self) -> bool:
+        return self._cached
+
+    @property
+    def trace(self) -> str:
+        return self._trace
+
+    def run(self) -> None:
+        if not self.running and not self.complete:
+            self._future = _submit_worker(self)
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        future = self._future
+        if future is not None and future.cancel():
+            self._oncomplete(_OperationCancelled())
+
+    @staticmethod
+    def _run(self) -> None:
+        try:
+            with _TraceSpan("check", self._trace, url=self._url) as span:
+                data = self._fetch()
+                span.set(cached=self._cached)
+        except Exception as err:
+            self._oncomplete(err)
+        else:
+            if self._cancelled:
+                self._oncomplete(_OperationCancelled())
+            elif isinstance(data, str):
+                self._oncomplete({"url": data})
+            elif isinstance(data, dict):
+                self._oncomplete(data)
+            else:
+                self._oncomplete(RuntimeError("Invalid server response. Context addon maintainer"))
+
+    def _fetch(self) -> Any:
+        # Responses are cached on disk per request parameters. Within max_age the cached
+        # response is used as is, after that it is revalidated with a conditional request.
+        import json, urllib.error
+        key = self._cache_key
+        path = os.path.join(_get_cache_directory("checks"), f'{key}.json') if key else ""
+        entry = _read_json_file(path) if path else {}
+
+        if "data" in entry and time.time() - entry.get("time", 0.0) < self._max_age:
+            self._cached = True
+            return entry["data"]
+
+        headers = {"Accept-Encoding": _accept_encoding}
+        if "data" in entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            if self._mirrors:
+                resp, self._url = _open_mirrors([self._url, *self._mirrors], headers, self._timeout, self._trace,
+                                                lambda: self._cancelled)
+            else:
+                resp = _open_url(self._url, headers, self._timeout, self._trace)
+            with resp:
+                body = resp.read()
+                with _TraceSpan("json_parse", self._trace) as span:
+                    span.bytes = len(body)
+                    data = json.loads(body)
+                etag = resp.headers.get("ETag", "")
+                last_modified = resp.headers.get("Last-Modified", "")
+        except urllib.error.HTTPError as err:
+            if err.code != 304 or "data" not in entry:
+                raise
+            self._cached = True
+            entry["time"] = time.time()
+            with suppress(OSError):
+                _write_json_file(path, entry)
+            return entry["data"]
+
+        if path:
+            with suppress(OSError, TypeError, ValueError):
+                _write_json_file(path, {"time": time.time(),
+                                        "etag": etag,
+                                        "last_modified": last_modified,
+                                        "data": data})
+        return data
+
+    def _oncomplete(self, result: Union[Dict[str, str], Exception]) -> None:
+        self._future = None
+        self._result = result
+        _release_worker(self)
+        if self._callback:
+            self._callback(self)
+
+
+class AddonUpdateDownloadHandler:
+
+    def __init__(self,
+                 url: str,
+                 callback: Optional[Callable[['AddonUpdateDownloadHandler'], None]]=None,
+                 chunk_size: Optional[int]=None,
+                 key: Optional[str]="",
+                 segments: Optional[int]=None,
+                 manifest: Optional[Any]=None,
+                 addon_path: Optional[str]="",
+                 sha256: Optional[str]="",
+                 size: Optional[int]=0,
+                 extract_path: Optional[str]="",
+                 package: Optional[str]="",
+                 progress_callback: Optional[Callable[['AddonUpdateDownloadHandler'], None]]=None,
+                 timeout: Optional[float]=None,
+                 trace: Optional[str]="",
+                 mirrors: Optional[List[str]]=None,
+                 rate_limit: Optional[float]=0.0) -> None:
+        self._url = url
+        self._mirrors = [mirror for mirror in mirrors or () if isinstance(mirror, str) and mirror]
+        self._trace = trace or _new_trace_id()
+        self._extract_path = extract_path
+        self._package = package
+        self._expected_sha256 = (sha256 or "").lower()
+        self._expected_size = int(size or 0)
+        self._sha256 = ""
+        self._manifest = manifest
+        self._addon_path = addon_path
+        self._differential = False
+        self._key = _get_safe_filename(key) if key else _get_download_key(url)
+        self._cache_key = key or ""
+        self._cached = False
+        self._future = None
+        self._result = None
+        self._callback = callback
+        self._progress_callback = progress_callback
+        self._reported_progress = -1.0
+        self._reported_time = 0.0
+        self._chunk_size = max(int(chunk_size or _download_chunk_size), 1024)
+        self._segments = min(max(int(segments or _download_segments), 1), _download_segments_max)
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._cancel_requested = False
+        self._timeout = float(_download_timeout if timeout is None else timeout)
+        self._deadline = 0.0
+        self._bucket = _TokenBucket(rate_limit) if rate_limit and rate_limit > 0.0 else None
+        self._received = 0
+        self._total = 0
+        self._offset = 0
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None
+
+    @property
+    def complete(self) -> bool:
+        return self._result is not None
+
+    @property
+    def path(self) -> Optional[str]:
+        result = self._result
+        if isinstance(result, str):
+            return result
+
+    @property
+    def result(self) -> Optional[Union[str, Exception]]:
+        return self._result
+
+    @property
+    def error(self) -> Optional[Exception]:
+        result = self._result
+        if isinstance(result, Exception):
+            return result
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def differential(self) -> bool:
+        return self._differential
+
+    @property
+    def cached(self) -> bool:
+        return self._cached
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @property
+    def received(self) -> int:
+        return self._received
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def progress(self) -> float:
+        total = self._total
+        return min(self._received / total, 1.0) if total else 0.0
+
+    @property
+    def throughput(self) -> float:
+        started = self._started
+        if started:
+            elapsed = time.monotonic() - started
+            if elapsed > 0.0:
+                return (self._received - self._offset) / elapsed
+        return 0.0
+
+    @property
+    def eta(self) -> float:
+        rate = self.throughput
+        total = self._total
+        if rate > 0.0 and total:
+            return max(total - self._received, 0) / rate
+        return 0.0
+
+    def run(self) -> None:
+        if not self.running and not self.complete:
+            self._future = _submit_worker(self)
+
+    @property
+    def trace(self) -> str:
+        return self._trace
+
+    def set_rate_limit(self, rate: float) -> None:
+        # Bytes per second, 0 for unlimited. Takes effect from the next chunk.
+        self._bucket = _TokenBucket(rate) if rate > 0.0 else None
+
+    def cancel(self) -> None:
+        # Stops at the next chunk. Partial files are kept so the download can resume.
+        self._cancel_requested = self._cancelled = True
+        future = self._future
+        if future is not None and future.cancel():
+            self._oncomplete(_OperationCancelled())
+
+    @staticmethod
+    def _run(self) -> None:
+        try:
+            if self._timeout > 0.0:
+                self._deadline = time.monotonic() + self._timeout
+            path = self._lookup_cache()
+            if path is None:
+                # Only one process downloads a release at a time. The others wait and
+                # take it from the download cache once it is there.
+                lock = _get_download_lock(self._key)
+                with _TraceSpan("lock_wait", self._trace, key=self._key) as span:
+                    lock.acquire(poll=self._poll_cache)
+                    span.set(acquired=lock.locked)
+                try:
+                    path = self._lookup_cache() if lock.locked else self._find_cached()
+                    if path is None:
+                        path = self._download_release()
+                finally:
+                    lock.release()
+        except Exception as err:
+            self._oncomplete(err)
+        else:
+            self._oncomplete(path)
+
+    def _open(self, headers: Optional[Dict[str, str]]=None) -> Any:
+        # The first request races the mirrors, the rest of the download uses the winner
+        if self._mirrors:
+            resp, self._url = _open_mirrors([self._url, *self._mirrors], headers, trace=self._trace,
+                                            cancelled=lambda: self._cancel_requested)
+            self._mirrors = []
+            return resp
+        return _open_url(self._url, headers, trace=self._trace)
+
+    def _download_release(self) -> str:
+        path = None
+        if self._manifest and self._addon_path:
+            # Any failure falls back to downloading the full release archive
+            with suppress(Exception):
+                path = self._traced_download("differential", self._download_differential)
+            self._check_cancelled()
+        if path is None and self._extract_path and self._package:
+            self._received = self._total = self._offset = 0
+            with suppress(_StreamExtractUnsupported):
+                path = self._traced_download("extract", self._download_extract)
+        if path is None:
+            self._received = self._total = self._offset = 0
+            path = self._traced_download("full", self._download)
+            path = _store_download_cache(path, self._sha256, self._cache_key, self._url)
+        return path
+
+    def _lookup_cache(self) -> Optional[str]:
+        with _TraceSpan("download_cache", self._trace, key=self._cache_key) as span:
+            path = self._find_cached()
+            span.set(hit=bool(path))
+            return path
+
+    def _find_cached(self) -> Optional[str]:
+        path, digest = _lookup_download_cache(self._expected_sha256, self._cache_key, self._expected_size)
+        if not path:
+            return None
+        self._cached = True
+        self._sha256 = digest
+        self._received = self._total = os.path.getsize(path)
+        return path
+
+    def _poll_cache(self) -> bool:
+        self._check_cancelled()
+        return bool(_lookup_download_cache(self._expected_sha256, self._cache_key, self._expected_size)[0])
+
+    def _traced_download(self, mode: str, download: Callable[[], str]) -> str:
+        with _TraceSpan("download", self._trace, url=self._url, mode=mode, segments=self._segments) as span:
+            try:
+                return download()
+            finally:
+                span.bytes = self._received - self._offset
+                span.set(offset=self._offset, total=self._total)
+
+    def _download_extract(self) -> str:
+        # Extracts the archive into the staging directory while it downloads, so the zip
+        # is never written to disk. This cannot resume, an interrupted download restarts.
+        import hashlib, shutil
+        root = self._extract_path
+        if os.path.exists(root):
+            shutil.rmtree(root)
+        os.makedirs(root)
+
+        extractor = _ZipStreamExtractor(root, self._package)
+        try:
+            with self._open() as resp:
+                total = int(resp.headers.get("Content-Length") or 0)
+                if total and self._expected_size and total != self._expected_size:
+                    raise RuntimeError("Update file size does not match the update server response")
+
+                self._total = total
+                self._started = time.monotonic()
+
+                hasher = hashlib.sha256()
+                read = resp.read
+                size = self._chunk_size
+                while True:
+                    chunk = read(size)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    extractor.feed(chunk)
+                    self._received += len(chunk)
+                    self._check_cancelled()
+                    self._throttle(len(chunk))
+                    self._report_progress()
+
+            if total and self._received != total:
+                raise RuntimeError(f'Download incomplete ({self._received} of {total} bytes)')
+
+            if self._expected_size and self._received != self._expected_size:
+                raise RuntimeError("Update file size does not match the update server response")
+
+            digest = hasher.hexdigest()
+            if self._expected_sha256 and digest != self._expected_sha256:
+                raise RuntimeError("Update file is corrupt (SHA-256 mismatch). Please try again")
+
+            extractor.close()
+        except BaseException:
+            extractor.abort()
+            shutil.rmtree(root, ignore_errors=True)
+            raise
+
+        self._sha256 = digest
+        return root
+
+    def _download_differential(self) -> str:
+        # Builds the release archive from the installed addon, fetching only the files
+        # whose hash differs from the manifest from <base_url><path>. Files are stored
+        # uncompressed since the archive is only read back by the installer.
+        import hashlib, json, urllib.parse, zipfile
+        manifest = self._manifest
+        if isinstance(manifest, str):
+            with _open_url(manifest, {"Accept-Encoding": _accept_encoding}, trace=self._trace) as resp:
+                manifest = json.loads(resp.read())
+
+        files = _parse_release_manifest(manifest)
+        base_url = manifest.get("base_url", "")
+        if not base_url:
+            raise ValueError("Update manifest has no base_url")
+
+        root = self._addon_path
+        installed = {}
+        for relpath, path in _iter_addon_files(root):
+            if relpath in files:
+                installed[relpath] = path
+
+        changed = [relpath for relpath, (digest, _) in files.items()
+                   if relpath not in installed or _hash_file(installed[relpath]) != digest]
+
+        self._total = sum(files[relpath][1] for relpath in changed)
+        self._started = time.monotonic()
+
+        package = os.path.basename(os.path.normpath(root))
+        base = os.path.join(_get_cache_directory("staging"), self._key)
+        part = f'{base}.delta.part'
+        path = f'{base}.zip'
+
+        try:
+            with zipfile.ZipFile(part, "w", zipfile.ZIP_STORED) as archive:
+                for relpath, (digest, size) in files.items():
+                    arcname = f'{package}/{relpath}'
+                    if relpath not in changed:
+                        archive.write(installed[relpath], arcname)
+                        continue
+
+                    hasher = hashlib.sha256()
+                    url = urllib.parse.urljoin(base_url, urllib.parse.quote(relpath))
+                    with _open_url(url, {"Accept-Encoding": _accept_encoding}, trace=self._trace) as resp, archive.open(arcname, "w", force_zip64=True) as file:
+                        for chunk in iter(lambda: resp.read(self._chunk_size), b""):
+                            hasher.update(chunk)
+                            file.write(chunk)
+                            self._received += len(chunk)
+                            self._check_cancelled()
+                            self._throttle(len(chunk))
+                            self._report_progress()
+                    if hasher.hexdigest() != digest:
+                        raise RuntimeError(f'Hash mismatch for "{relpath}"')
+            os.replace(part, path)
+        except BaseException:
+            with suppress(OSError):
+                os.remove(part)
+            raise
+
+        self._differential = True
+        return path
+
+    def _download(self) -> str:
+        # Partial downloads are kept in the staging directory as <key>.part, next to a
+        # <key>.json file holding the validators needed to resume them with a Range request
+        # on the next attempt, even from another Blender session.
+        import hashlib, urllib.error
+        base = os.path.join(_get_cache_directory("staging"), self._key)
+        part = f'{base}.part'
+        meta_path = f'{base}.json'
+        path = f'{base}.zip'
+
+        meta = _read_json_file(meta_path)
+        validator = meta.get("etag") or meta.get("last_modified")
+
+        # A partial download resumes from the mirror its validators came from
+        if validator and meta.get("url") in {self._url, *self._mirrors}:
+            self._url = meta["url"]
+            self._mirrors = []
+
+        if meta.get("segments") or (self._segments > 1 and not os.path.isfile(part)):
+            result = self._download_segmented(part, meta_path, path, meta)
+            if result:
+                return result
+            meta = {}
+            validator = ""
+
+        offset = 0
+        if validator and os.path.isfile(part):
+            offset = os.path.getsize(part)
+
+        headers = {}
+        if offset:
+            headers["Range"] = f'bytes={offset}-'
+            headers["If-Range"] = validator
+
+        try:
+            resp = self._open(headers)
+        except urllib.error.HTTPError as err:
+            if err.code == 416 and offset and offset == meta.get("total"):
+                self._offset = self._received = self._total = offset
+                return self._finalize(part, meta_path, path)
+            raise
+
+        with resp:
+            if resp.status == 206:
+                start, total = _parse_content_range(resp.headers.get("Content-Range"))
+                if start != offset:
+                    raise RuntimeError("Invalid server response to resumed download")
+                mode = "ab"
+            else:
+                offset = 0
+                total = int(resp.headers.get("Content-Length") or 0)
+                mode = "wb"
+
+            if total and self._expected_size and total != self._expected_size:
+                self._discard(part, meta_path)
+                raise RuntimeError("Update file size does not match the update server response")
+
+            # The digest is computed on the stream as it is written. Only a resumed
+            # download reads back the part that was received by a previous attempt.
+            hasher = hashlib.sha256()
+            if mode == "ab":
+                with open(part, "rb") as file:
+                    for chunk in iter(lambda: file.read(1 << 20), b""):
+                        hasher.update(chunk)
+
+            etag = resp.headers.get("ETag", "")
+            if etag.startswith("W/"):
+                etag = ""
+            last_modified = resp.headers.get("Last-Modified", "")
+            if etag or last_modified:
+                _write_json_file(meta_path, {"url": self.url,
+                                             "etag": etag,
+                                             "last_modified": last_modified,
+                                             "total": total})
+            elif os.path.exists(meta_path):
+                os.remove(meta_path)
+
+            self._total = total
+            self._offset = self._received = offset
+            self._started = time.monotonic()
+
+            with open(part, mode) as file:
+                read = resp.read
+                update = hasher.update
+                size = self._chunk_size
+                while True:
+                    chunk = read(size)
+                    if not chunk:
+                        break
+                    file.write(chunk)
+                    update(chunk)
+                    self._received += len(chunk)
+                    self._check_cancelled()
+                    self._throttle(len(chunk))
+                    self._report_progress()
+
+        if total and self._received != total:
+            raise RuntimeError(f'Download incomplete ({self._received} of {total} bytes)')
+
+        return self._finalize(part, meta_path, path, hasher.hexdigest())
+
+    def _finalize(self, part: str, meta_path: str, path: str, digest: Optional[str]=None) -> str:
+        # Segmented downloads arrive out of order so their digest is computed once the
+        # file is complete, while it is still in the page cache.
+        if digest is None:
+            digest = _hash_file(part)
+        self._sha256 = digest
+
+        if self._expected_size and os.path.getsize(part) != self._expected_size:
+            self._discard(part, meta_path)
+            raise RuntimeError("Update file size does not match the update server response")
+
+        if self._expected_sha256 and digest != self._expected_sha256:
+            self._discard(part, meta_path)
+            raise RuntimeError("Update file is corrupt (SHA-256 mismatch). Please try again")
+
+        os.replace(part, path)
+        with suppress(OSError):
+            os.remove(meta_path)
+        return path
+
+    @staticmethod
+    def _discard(part: str, meta_path: str) -> None:
+        for path in (part, meta_path):
+            with suppress(OSError):
+                os.remove(path)
+
+    def _download_segmented(self, part: str, meta_path: str, path: str, meta: Dict[str, Any]) -> Optional[str]:
+        # Splits the file into byte ranges fetched concurrently into a preallocated file.
+        # Returns None when the server does not support ranges (or the file is too small
+        # to be worth splitting) so the caller falls back to a single stream.
+        import urllib.error
+        from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+        segments = meta.get("segments")
+        validator = meta.get("etag") or meta.get("last_modified")
+        total = meta.get("total", 0)
+
+        if not (segments and validator and total and os.path.isfile(part) and os.path.getsize(part) == total):
+            try:
+                with self._open({"Range": "bytes=0-0"}) as resp:
+                    status = resp.status
+                    start, total = _parse_content_range(resp.headers.get("Content-Range"))
+                    etag = resp.headers.get("ETag", "")
+                    last_modified = resp.headers.get("Last-Modified", "")
+            except urllib.error.HTTPError as err:
+                if err.code == 416:
+                    return None
+                raise
+
+            if status != 206 or start != 0 or not total:
+                return None
+
+            if self._expected_size and total != self._expected_size:
+                raise RuntimeError("Update file size does not match the update server response")
+
+            count = min(self._segments, -(-total // _download_segment_min_size))
+            if count < 2:
+                return None
+
+            if etag.startswith("W/"):
+                etag = ""
+            validator = etag or last_modified
+            meta = {"url": self.url, "etag": etag, "last_modified": last_modified, "total": total}
+
+            size = -(-total // count)
+            segments = [[start, min(start + size, total) - 1, start] for start in range(0, total, size)]
+
+            with open(part, "wb") as file:
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(file.fileno(), 0, total)
+                else:
+                    file.truncate(total)
+
+        received = sum(pos - start for start, _, pos in segments)
+        self._total = total
+        self._offset = self._received = received
+        self._started = time.monotonic()
+
+        def save() -> None:
+            if validator:
+                with self._lock:
+                    _write_json_file(meta_path, dict(meta, segments=segments))
+
+        save()
+        with ThreadPoolExecutor(max_workers=min(self._segments, len(segments))) as executor:
+            futures = [executor.submit(self._download_segment, part, segment, validator, save)
+                       for segment in segments if segment[2] <= segment[1]]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            errors = [future.exception() for future in done if future.exception()]
+            if errors:
+                self._cancelled = True
+
+        if errors:
+            save()
+            raise errors[0]
+
+        if self._received != total:
+            raise RuntimeError(f'Download incomplete ({self._received} of {total} bytes)')
+
+        return self._finalize(part, meta_path, path)
+
+    def _download_segment(self,
+                          part: str,
+                          segment: List[int],
+                          validator: str,
+                          save: Callable[[], None]) -> None:
+        pos, end = segment[2], segment[1]
+        headers = {"Range": f'bytes={pos}-{end}'}
+        if validator:
+            headers["If-Range"] = validator
+
+        with _open_url(self.url, headers, trace=self._trace) as resp:
+            if resp.status != 206 or _parse_content_range(resp.headers.get("Content-Range"))[0] != pos:
+                with suppress(OSError):
+                    os.remove(part)
+                raise RuntimeError("Update file changed on server during download. Please try again")
+
+            with open(part, "r+b") as file:
+                file.seek(pos)
+                read = resp.read
+                size = self._chunk_size
+                while pos <= end and not self._cancelled:
+                    chunk = read(min(size, end - pos + 1))
+                    if not chunk:
+                        break
+                    file.write(chunk)
+                    pos += len(chunk)
+                    segment[2] = pos
+                    with self._lock:
+                        self._received += len(chunk)
+                    self._check_cancelled()
+                    self._throttle(len(chunk))
+                    self._report_progress()
+
+        if pos <= end:
+            raise RuntimeError(f'Download incomplete (segment {segment[0]}-{end} stopped at {pos})')
+
+        save()
+
+    def _check_cancelled(self) -> None:
+        if self._cancel_requested:
+            raise _OperationCancelled()
+        if self._deadline and time.monotonic() > self._deadline:
+            raise TimeoutError(f'Download timed out after {self._timeout:g} seconds')
+
+    def _throttle(self, size: int) -> None:
+        bucket = self._bucket
+        if bucket is not None:
+            end = time.monotonic() + bucket.take(size)
+            while self._bucket is bucket:
+                delay = end - time.monotonic()
+                if delay <= 0.0:
+                    break
+                time.sleep(min(delay, 0.1))
+                self._check_cancelled()
+
+    def _report_progress(self) -> None:
+        # Only reports once progress has moved by _progress_report_step, or after
+        # _progress_report_interval so rate and time remaining still update while slow
+        callback = self._progress_callback
+        if callback:
+            progress = self.progress
+            now = time.monotonic()
+            if (progress - self._reported_progress >= _progress_report_step
+                or now - self._reported_time >= _progress_report_interval):
+                self._reported_progress = progress
+                self._reported_time = now
+                callback(self)
+
+    def _oncomplete(self, result: Union[str, Exception]) -> None:
+        self._future = None
+        self._result = result
+        _release_worker(self)
+        if self._callback:
+            self._callback(self)
+
+
+class AddonUpdateValidationHandler:
+
+    def __init__(self,
+                 path: str,
+                 name: str,
+                 sha256: Optional[str]="",
+                 callback: Optional[Callable[['AddonUpdateValidationHandler'], None]]=None,
+                 trace: Optional[str]="") -> None:
+        self._path = path
+        self._trace = trace or _new_trace_id()
+        self._name = name
+        self._sha256 = sha256
+        self._future = None
+        self._result = None
+        self._callback = callback
+        self._cancelled = False
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None
+
+    @property
+    def complete(self) -> bool:
+        return self._result is not None
+
+    @property
+    def result(self) -> Optional[Union[str, Exception]]:
+        return self._result
+
+    @property
+    def error(self) -> Optional[Exception]:
+        result = self._result
+        if isinstance(result, Exception):
+            return result
 
+    @property
+    def path(self) -> str:
+        return self._path
 
-def _get_or_create_update_script_text() -> 'Text':
-    name = f'{_addon_module_name}_update_script'
-    text = bpy.data.texts.get(name)
-    if text:
-        text.clear()
-    else:
-        text = bpy.data.texts.new(name)
-    return text
+    def run(self) -> None:
+        if not self.running and not self.complete:
+            self._future = _submit_worker(self)
 
+    def cancel(self) -> None:
+        self._cancelled = True
+        future = self._future
+        if future is not None and future.cancel():
+            self._oncomplete(_OperationCancelled())
 
-def _resolve_operator_function(op: Type[Operator]) -> Optional[Callable]:
-    tokens = op.bl_idname.split(".")
-    if len(tokens) == 2:
-        ns = getattr(bpy.ops, tokens[0], None)
-        if ns:
-            return getattr(ns, tokens[1], None)
+    @staticmethod
+    def _run(self) -> None:
+        try:
+            with _TraceSpan("validate", self._trace, path=self._path) as span:
+                with suppress(OSError):
+                    span.bytes = os.path.getsize(self._path)
+                digest = _validate_update_archive(self._path, self._name, self._sha256)
+        except Exception as err:
+            self._oncomplete(err)
+        else:
+            self._oncomplete(_OperationCancelled() if self._cancelled else digest)
 
+    def _oncomplete(self, result: Union[str, Exception]) -> None:
+        self._future = None
+        self._result = result
+        _release_worker(self)
+        if self._callback:
+            self._callback(self)
 
-def _reset_update_status(prefs: 'AddonUpdatePreferences') -> None:
-    prefs.new_release_date = ""
-    prefs.new_release_notes = ""
-    prefs.new_release_path = ""
-    prefs.new_release_url = ""
-    prefs.new_release_version = ""
-    prefs.new_release_warning = ""
-    prefs.update_error = ""
-    prefs.update_status = 'NONE'
 
+class AddonUpdateInstallHandler:
 
-class AddonUpdateCheckHandler:
+    # Each step runs in its own timer tick so Blender can redraw in between. The addon
+    # module is disabled part way through, but this module stays imported so the
+    # remaining steps still run.
+    _steps = ("stage", "backup", "disable", "replace", "refresh", "enable", "restore", "cleanup")
 
     def __init__(self,
-                 url: str,
-                 callback: Optional[Callable[['AddonUpdateCheckHandler'], None]]=None) -> None:
-        self._url = url
-        self._thread = None
-        self._result = None
+                 name: str,
+                 path: str,
+                 addon_path: str,
+                 version: Optional[str]="",
+                 callback: Optional[Callable[['AddonUpdateInstallHandler'], None]]=None,
+                 trace: Optional[str]="") -> None:
+        self._name = name
+        self._trace = trace or _new_trace_id()
+        self._path = path
+        self._addon_path = addon_path
+        self._version = version
         self._callback = callback
+        self._index = -1
+        self._staging = ""
+        self._previous = ""
+        self._snapshot = ""
+        self._props = []
+        self._timings: List[Tuple[str, float]] = []
+        self._result = None
 
     @property
     def running(self) -> bool:
-        return self._thread is not None
+        return self._index >= 0 and self._result is None
 
     @property
     def complete(self) -> bool:
         return self._result is not None
 
     @property
-    def data(self) -> Optional[Dict[str, str]]:
-        result = self._result
-        if isinstance(result, dict):
-            return result
-
-    @property
-    def result(self) -> Optional[Union[Dict[str, str], Exception]]:
+    def result(self) -> Optional[Union[bool, Exception]]:
         return self._result
 
     @property
@@ -291,32 +2653,161 @@ class AddonUpdateCheckHandler:
             return result
 
     @property
-    def url(self) -> str:
-        return self._url
+    def step(self) -> str:
+        if 0 <= self._index < len(self._steps):
+            return self._steps[self._index]
+        return ""
 
-    def run(self) -> None:
+    @property
+    def snapshot(self) -> str:
+        return self._snapshot
+
+    @property
+    def timings(self) -> List[Tuple[str, float]]:
+        return list(self._timings)
+
+    @property
+    def trace(self) -> str:
+        return self._trace
+
+    def run(self, blocking: Optional[bool]=False) -> None:
+        # Blocking runs every step before returning, for background mode where timers
+        # never get to run
         if not self.running and not self.complete:
-            self._thread = threading.Thread(target=self._run, args=(self,))
-            self._thread.start()
+            prefs = _get_addon_preferences(self._name)
+            if prefs is not None:
+                self._props = [(key, prefs.get(key, default)) for key, default in _preserved_preferences]
+            self._index = 0
+            if blocking:
+                while self._tick() is not None:
+                    pass
+            else:
+                bpy.app.timers.register(self._tick, first_interval=0.0, persistent=True)
 
-    @staticmethod
-    def _run(self) -> None:
-        import json, urllib, urllib.request
+    def _tick(self) -> Optional[float]:
+        step = self._steps[self._index]
+        span = _TraceSpan(step, self._trace, addon=self._name)
         try:
-            resp = urllib.request.urlopen(self.url, timeout=60)
-            data = json.loads(resp.read())
+            with span:
+                getattr(self, f'_{step}')()
         except Exception as err:
+            self._timings.append((step, span.duration))
+            self._fail(step, err)
             self._oncomplete(err)
+            return None
+
+        self._timings.append((step, span.duration))
+        self._index += 1
+        if self._index < len(self._steps):
+            return 0.0
+
+        self._oncomplete(True)
+        return None
+
+    def _stage(self) -> None:
+        if os.path.isdir(self._path):
+            self._staging = self._path
         else:
-            if isinstance(data, str):
-                self._oncomplete({"url": data})
-            elif isinstance(data, dict):
-                self._oncomplete(data)
-            else:
-                self._oncomplete(RuntimeError("Invalid server response. Context addon maintainer"))
+            self._staging = _stage_addon_update(self._path, self._addon_path, self._name)
 
-    def _oncomplete(self, result: Union[Dict[str, str], Exception]) -> None:
-        self._thread = None
+    def _backup(self) -> None:
+        if _backup_mode == 'HARDLINK':
+            self._snapshot = _create_addon_snapshot(self._addon_path, self._version)
+
+    def _disable(self) -> None:
+        addon_utils.disable(self._name, default_set=True)
+
+    def _replace(self) -> None:
+        self._previous = _swap_addon_directory(self._addon_path, self._staging)
+        self._staging = ""
+
+    def _refresh(self) -> None:
+        addon_utils.modules_refresh()
+
+    def _enable(self) -> None:
+        errors = []
+        mod = addon_utils.enable(self._name, default_set=True, handle_error=errors.append)
+        if errors:
+            raise errors[0]
+        if mod is None:
+            raise RuntimeError(f'Failed to enable {self._name}')
+
+    def _restore(self) -> None:
+        # The preferences now belong to the newly enabled version of the addon, so they
+        # are written as ID properties rather than through properties of this module
+        prefs = _get_addon_preferences(self._name)
+        if prefs is None:
+            raise RuntimeError("Unable to find addon preferences")
+        prefs["new_release_version"] = ""
+        prefs["new_release_url"] = ""
+        prefs["new_release_date"] = ""
+        prefs["new_release_hash"] = ""
+        prefs["new_release_path"] = ""
+        _download_cache_pinned.pop(self._name, None)
+        prefs["new_release_size"] = 0.0
+        prefs["update_error"] = ""
+        prefs["update_status"] = 0
+        for key, value in self._props:
+            prefs[key] = value
+        with suppress(Exception):
+            bpy.ops.preferences.addon_expand(module=self._name)
+
+    def _cleanup(self) -> None:
+        # The replaced directory becomes the backup snapshot unless one was taken already
+        import shutil
+        previous, self._previous = self._previous, ""
+        if self._snapshot or _backup_mode != 'RENAME':
+            shutil.rmtree(previous, ignore_errors=True)
+        else:
+            try:
+                self._snapshot = _store_addon_snapshot(self._addon_path, previous, self._version)
+            except Exception as err:
+                print(err)
+                shutil.rmtree(previous, ignore_errors=True)
+
+    def _fail(self, step: str, error: Exception) -> None:
+        import shutil
+        print(error)
+
+        if step in {"disable", "replace"}:
+            with suppress(Exception):
+                self._enable()
+
+        elif step in {"refresh", "enable"}:
+            try:
+                with _TraceSpan("rollback", self._trace, addon=self._name):
+                    with suppress(Exception):
+                        addon_utils.disable(self._name, default_set=True)
+                    _restore_addon_directory(self._addon_path, self._previous)
+                    self._previous = ""
+                    addon_utils.modules_refresh()
+                    self._enable()
+            except Exception as err:
+                print(err)
+                self._report_reinstall(self._snapshot or self._previous)
+
+        if self._staging:
+            shutil.rmtree(self._staging, ignore_errors=True)
+            self._staging = ""
+
+        with suppress(Exception):
+            prefs = _get_addon_preferences(self._name)
+            prefs.update_status = 'ERROR'
+            prefs.update_error = str(error)
+
+    def _report_reinstall(self, backup_path: str) -> None:
+        def draw_func(menu, _):
+            layout = menu.layout
+            layout.separator()
+            layout.label(icon='BLANK1', text="An unexpected error occurred. See console for  details")
+            if backup_path:
+                layout.label(icon='BLANK1', text=f'A backup of the addon was created at {backup_path}')
+            layout.label(icon='BLANK1', text="Please reinstall the addon manually.")
+            layout.separator()
+        with suppress(Exception):
+            bpy.context.window_manager.popup_menu(draw_func, title="Reinstallation Failed", icon='ERROR')
+
+    def _oncomplete(self, result: Union[bool, Exception]) -> None:
         self._result = result
         if self._callback:
             self._callback(self)
@@ -324,53 +2815,20 @@ class AddonUpdateCheckHandler:
 
 class AddonUpdateCheck(Operator):
     bl_idname = ""
+    _addon_name = ""
     bl_label = "Check for Update"
     bl_description = "Check if an update is available"
     bl_options = {'INTERNAL'}
 
-    _timer = None
-    _handler = None
-
     @classmethod
     def poll(cls, context: 'Context') -> bool:
-        if _can_update():
-            prefs = _get_addon_preferences(context)
+        if _can_update(cls._addon_name):
+            prefs = _get_addon_preferences(cls._addon_name, context)
             return isinstance(prefs, AddonUpdatePreferences) and bool(prefs.api_token)
         return False
 
-    def modal(self, context: 'Context', event: 'Event') -> Set[str]:
-        if event.type != 'TIMER':
-            return {'PASS_THROUGH'}
-
-        prefs = _get_addon_preferences()
-
-        area = context.area
-        if area:
-            area.tag_redraw()
-
-        handler = self._handler
-        if not handler.complete:
-            prefs.update_progress = self._timer.time_duration
-            return {'PASS_THROUGH'}
-
-        self.cancel(context)
-
-        error = handler.error
-        if error:
-            prefs.update_status = 'ERROR'
-            prefs.update_error = str(error)
-            return {'CANCELLED'}
-
-        data = handler.data
-        if not data.get("url", ""):
-            prefs.update_status = 'NO_UPDATE'
-            return {'CANCELLED'}
-
-        _assign_update_check_response_params(prefs, data)
-        return {'FINISHED'}
-
     def execute(self, context: 'Context') -> Set[str]:
-        prefs = _get_addon_preferences(context)
+        prefs = _get_addon_preferences(self._addon_name, context)
 
         if prefs is None:
             self.report({'ERROR'}, "Unable to find addon preferences")
@@ -380,44 +2838,46 @@ class AddonUpdateCheck(Operator):
             self.report({'ERROR'}, "Invalid preferences. Contact addon maintainer")
             return {'CANCELLED'}
 
-        if not _update_check_url:
+        url = _get_update_check_url(self._addon_name)
+        if not url:
             return _cancel_with_error(self, prefs, "Update server URL not found. Contact addon maintainer.")
 
-        version = _get_addon_info_value("version")
+        version = _get_addon_info_value(self._addon_name, "version")
         if not _validate_version_tuple(version):
             return _cancel_with_error(self, prefs, "Invalid bl_info.version. Contact addon maintainer")
 
         prefs.update_status = 'CHECKING'
         prefs.update_progress = 0.0
-
-        area = context.area
-        if area:
-            area.tag_redraw()
-
-        self._timer = context.window_manager.event_timer_add(0.1, window=context.window)
-        self._handler = AddonUpdateCheckHandler(_encode_request_url(_get_request_params(prefs, version)))
-        self._handler.run()
-
-        context.window_manager.modal_handler_add(self)
-        return {'RUNNING_MODAL'}
-
-    def cancel(self, context: 'Context') -> None:
-        context.window_manager.event_timer_remove(self._timer)
-        self._timer = None
-
-        prefs = _get_addon_preferences()
-        if prefs:
-            prefs.update_progress = 0.0
+        _start_spinner(self._addon_name)
+        _tag_preferences_redraw()
+
+        _cancel_addon_operation(self._addon_name)
+        trace = _new_trace_id()
+        with _TraceSpan("url_encode", trace, addon=self._addon_name):
+            params = _get_request_params(self._addon_name, prefs, version)
+            request_url = _encode_request_url(url, params)
+        handler = AddonUpdateCheckHandler(request_url,
+                                          _main_thread_callback(_on_update_check_complete, self._addon_name),
+                                          cache_key=_get_check_cache_key(url, params),
+                                          trace=trace,
+                                          mirrors=_get_update_check_mirrors(self._addon_name, params))
+        _addon_operations[self._addon_name] = handler
+        handler.run()
+        return {'FINISHED'}
 
 
 class AddonUpdateReset(Operator):
     bl_idname = ""
+    _addon_name = ""
     bl_label = "OK"
     bl_description = "Acknowledge"
     bl_options = {'INTERNAL'}
 
     def execute(self, context: 'Context') -> Set[str]:
-        prefs = _get_addon_preferences(context)
+        _cancel_addon_operation(self._addon_name)
+        _cancel_prefetch(self._addon_name)
+        _stop_spinner(self._addon_name)
+        prefs = _get_addon_preferences(self._addon_name, context)
         if isinstance(prefs, AddonUpdatePreferences):
             _reset_update_status(prefs)
 
@@ -426,124 +2886,126 @@ class AddonUpdateReset(Operator):
 
 class AddonUpdateDownload(Operator):
     bl_idname = ""
+    _addon_name = ""
     bl_label = "Download"
     bl_description = "Download update"
     bl_options = {'INTERNAL'}
 
-    _timer = None
-    _thread = None
-    _result = None
-
     @classmethod
     def poll(cls, context: 'Context') -> bool:
-        if _can_update():
-            prefs = _get_addon_preferences(context)
+        if _can_update(cls._addon_name):
+            prefs = _get_addon_preferences(cls._addon_name, context)
             return isinstance(prefs, AddonUpdatePreferences) and prefs.update_status == 'AVAILABLE'
         return False
 
-    def modal(self, context: 'Context', event: 'Event') -> Set[str]:
-        if event.type != 'TIMER':
-            return {'PASS_THROUGH'}
-
-        prefs = _get_addon_preferences(context)
-        prefs.update_progress = self._timer.time_duration
-
-        area = context.area
-        if area:
-            area.tag_redraw()
-
-        res = self._result
-        if res is None:
-            return {'PASS_THROUGH'}
-
-        self._thread.join()
-        self._thread = None
-        self._result = None
-        self.cancel(context)
-
-        if isinstance(res, Exception):
-            prefs.update_status = 'ERROR'
-            prefs.update_error = str(res)
-            self.report({'ERROR'}, str(res))
-            return {'CANCELLED'}
-
-        prefs.update_status = 'READY'
-        prefs.new_release_path = res
-        return {'FINISHED'}
-
     def execute(self, context: 'Context') -> Set[str]:
 
-        prefs = _get_addon_preferences(context)
+        prefs = _get_addon_preferences(self._addon_name, context)
 
         if prefs is None:
             self.report({'ERROR'}, "Unable to find addon preferences")
             return {'CANCELLED'}
 
-        url = prefs.new_release_url
-        if not url:
+        if not prefs.new_release_url:
             return _cancel_with_error(self, prefs, "Invalid download URL")
 
+        version, path = _prefetched_releases.get(self._addon_name, ("", ""))
+        if path and version == prefs.new_release_version and os.path.exists(path):
+            prefs.new_release_path = _download_cache_pinned[self._addon_name] = path
+            prefs.update_status = 'READY'
+            _tag_preferences_redraw()
+            return {'FINISHED'}
+
         prefs.update_status = 'DOWNLOADING'
         prefs.update_progress = 0.0
-
-        self._timer = context.window_manager.event_timer_add(0.1, window=context.window)
-        self._result = None
-        self._thread = threading.Thread(target=_send_update_download_request, args=(self, url))
-        self._thread.start()
-
-        context.window_manager.modal_handler_add(self)
-        return {'RUNNING_MODAL'}
-
-    def cancel(self, context: 'Context') -> None:
-        context.window_manager.event_timer_remove(self._timer)
-        self._timer = None
-
-        prefs = _get_addon_preferences(context)
-        if prefs:
-            prefs.update_progress = 0.0
+        _reset_download_progress(prefs)
+        _start_spinner(self._addon_name)
+        _tag_preferences_redraw()
+
+        _cancel_addon_operation(self._addon_name)
+
+        # A background download of this release is finished at full speed instead
+        version, handler = _prefetch_operations.pop(self._addon_name, ("", None))
+        if handler is not None:
+            if version == prefs.new_release_version:
+                if isinstance(handler, AddonUpdateValidationHandler):
+                    prefs.new_release_path = _download_cache_pinned[self._addon_name] = handler.path
+                    prefs.update_status = 'VALIDATING'
+                else:
+                    handler.set_rate_limit(0.0)
+                _addon_operations[self._addon_name] = handler
+                return {'FINISHED'}
+            handler.cancel()
+
+        handler = _create_download_handler(self._addon_name,
+                                           prefs,
+                                           _main_thread_callback(_on_download_complete, self._addon_name))
+        _addon_operations[self._addon_name] = handler
+        handler.run()
+        return {'FINISHED'}
 
 
 class AddonUpdateInstall(Operator):
     bl_idname = ""
+    _addon_name = ""
     bl_label = "Install"
     bl_description = "Install update"
     bl_options = {'INTERNAL'}
 
     @classmethod
     def poll(cls, context: 'Context') -> bool:
-        if _can_update():
-            prefs = _get_addon_preferences(context)
+        if _can_update(cls._addon_name):
+            prefs = _get_addon_preferences(cls._addon_name, context)
             return isinstance(prefs, AddonUpdatePreferences) and prefs.update_status == 'READY'
         return False
 
     def execute(self, context: 'Context') -> Set[str]:
 
-        prefs = _get_addon_preferences(context)
+        prefs = _get_addon_preferences(self._addon_name, context)
         if prefs is None:
             self.report({'ERROR'}, "Unable to find addon preferences")
             return {'CANCELLED'}
 
         path = prefs.new_release_path
 
+        # The archive may have been evicted from a download cache shared with other
+        # processes, or cleared since a restart. It is downloaded again instead.
+        if not os.path.exists(path) and prefs.new_release_url:
+            download = _resolve_operator_function(self._addon_name, AddonUpdateDownload)
+            if download:
+                _download_cache_pinned.pop(self._addon_name, None)
+                _prefetched_releases.pop(self._addon_name, None)
+                prefs.new_release_path = ""
+                prefs.update_status = 'AVAILABLE'
+                download()
+                return {'FINISHED'}
+
         err = _check_update_filepath(path)
         if err:
             return _cancel_with_error(self, prefs, err)
 
-        text = _get_or_create_update_script_text()
-        text.write(_update_script.replace("<ADDON>", _addon_module_name).replace("<FILEPATH>", path))
+        if not os.path.isdir(path) and not _is_validated_update_archive(path):
+            try:
+                _validate_update_archive(path, self._addon_name)
+            except Exception as err:
+                return _cancel_with_error(self, prefs, err)
 
-        try:
-            context = context.copy()
-            context["edit_text"] = text
-            bpy.ops.text.run_script(context)
-        except Exception as err:
-            return _cancel_with_error(err)
+        mod = _get_addon_module(self._addon_name)
+        if mod is None:
+            return _cancel_with_error(self, prefs, "Failed to find addon directory")
+
+        prefs.update_status = 'INSTALLING'
+        AddonUpdateInstallHandler(self._addon_name,
+                                  path,
+                                  os.path.dirname(mod.__file__),
+                                  _version_tuple_to_string(mod.bl_info.get("version", ()))).run()
 
         return {'FINISHED'}
         
 
 class AddonUpdateAvailable(Operator):
     bl_idname = ""
+    _addon_name = ""
     bl_label = "Update Avavailable"
     bl_description = "An addon update is available"
     bl_options = {'INTERNAL'}
@@ -557,11 +3019,11 @@ class AddonUpdateAvailable(Operator):
 
     @classmethod
     def poll(cls, context: 'Context') -> bool:
-        prefs = _get_addon_preferences(context)
+        prefs = _get_addon_preferences(cls._addon_name, context)
         return prefs is not None and prefs.update_status == 'AVAILABLE'
 
     def invoke(self, context: 'Context', event: 'Event') -> Set[str]:
-        self.name = _get_addon_info_value("name", "")
+        self.name = _get_addon_info_value(self._addon_name, "name", "")
         return context.window_manager.invoke_props_dialog(self)
     
     def draw(self, context: 'Context') -> None:
@@ -577,15 +3039,15 @@ class AddonUpdateAvailable(Operator):
             self.report({'ERROR'}, "Failed to access Blender preferences")
             return {'CANCELLED'}
 
-        download = _resolve_operator_function(AddonUpdateDownload)
+        download = _resolve_operator_function(self._addon_name, AddonUpdateDownload)
         if not download:
             self.report({'ERROR'}, "Invalid download operator. Contact addon maintainer")
             return {'CANCELLED'}
 
         bpy.ops.sceen.userpref_show('INVOKE_DEFAULT')
         prefs.active_section = 'ADDONS'
-        bpy.ops.preferences.addon_show(module=_addon_module_name)
-        bpy.ops.preferences.addon_expand(module=_addon_module_name)
+        bpy.ops.preferences.addon_show(module=self._addon_name)
+        bpy.ops.preferences.addon_expand(module=self._addon_name)
         download()
 
         return {'FINISHED'}
@@ -614,6 +3076,21 @@ class AddonUpdatePreferences:
         options=set()
         )
 
+    prefetch_updates: BoolProperty(
+        name="Download in Background",
+        description="Download available updates in the background so they are ready to install",
+        default=False,
+        options=set()
+        )
+
+    prefetch_rate_limit: IntProperty(
+        name="Bandwidth Limit",
+        description="Maximum rate of background downloads in KiB/s (0 for unlimited)",
+        min=0,
+        default=1024,
+        options=set()
+        )
+
     new_release_date: StringProperty(
         name="Date",
         description="Release date (optional)",
@@ -621,6 +3098,13 @@ class AddonUpdatePreferences:
         options={'HIDDEN'}
         )
 
+    new_release_hash: StringProperty(
+        name="SHA-256",
+        description="Expected SHA-256 digest of the update file (optional)",
+        default="",
+        options={'HIDDEN'}
+        )
+
     new_release_notes: StringProperty(
         name="Notes",
         description="Release notes URL (optional)",
@@ -635,6 +3119,14 @@ class AddonUpdatePreferences:
         options={'HIDDEN'}
         )
 
+    new_release_size: FloatProperty(
+        name="Size",
+        description="Expected size of the update file in bytes (optional)",
+        min=0.0,
+        default=0.0,
+        options={'HIDDEN'}
+        )
+
     new_release_url: StringProperty(
         name="URL",
         description="Download URL for new release",
@@ -656,6 +3148,22 @@ class AddonUpdatePreferences:
         options={'HIDDEN'}
         )
 
+    update_bytes_received: FloatProperty(
+        name="Received",
+        description="Number of bytes of the update received so far",
+        min=0.0,
+        default=0.0,
+        options={'HIDDEN'}
+        )
+
+    update_bytes_total: FloatProperty(
+        name="Size",
+        description="Size of the update in bytes (0 if unknown)",
+        min=0.0,
+        default=0.0,
+        options={'HIDDEN'}
+        )
+
     update_error: StringProperty(
         name="Error",
         description="Update error message",
@@ -671,6 +3179,22 @@ class AddonUpdatePreferences:
         options={'HIDDEN'}
         )
 
+    update_throughput: FloatProperty(
+        name="Throughput",
+        description="Download rate in bytes per second",
+        min=0.0,
+        default=0.0,
+        options={'HIDDEN'}
+        )
+
+    update_eta: FloatProperty(
+        name="ETA",
+        description="Estimated seconds until the download completes",
+        min=0.0,
+        default=0.0,
+        options={'HIDDEN'}
+        )
+
     update_status: EnumProperty(
         name="Status",
         description="Update status",
@@ -681,7 +3205,9 @@ class AddonUpdatePreferences:
             ('NO_UPDATE', "No update available", ""),
             ('AVAILABLE', "Update available", ""),
             ('DOWNLOADING', "Downloading update", ""),
+            ('VALIDATING', "Validating update", ""),
             ('READY', "Ready to install", ""),
+            ('INSTALLING', "Installing update", ""),
             ],
         default='NONE',
         options={'HIDDEN'}
@@ -694,8 +3220,24 @@ class AddonUpdatePreferences:
         elif progress < 0.75: return 'PROP_ON'
         else                : return 'PROP_CON'
 
+    def _download_progress_text(self) -> str:
+        received = self.update_bytes_received
+        total = self.update_bytes_total
+        if total:
+            text = f'{_format_bytes(received)} of {_format_bytes(total)} ({received / total:.0%})'
+        else:
+            text = _format_bytes(received)
+        rate = self.update_throughput
+        if rate:
+            text += f'  {_format_bytes(rate)}/s'
+        eta = self.update_eta
+        if eta:
+            text += f'  {_format_duration(eta)} remaining'
+        return text
+
     def _release_date(self) -> str:
         try:
+            import datetime
             date = self.new_release_date
             date = datetime.date(int(date[:4]), int(date[4:6]), int(date[6:]))
             return date.strftime("%b %d %Y")
@@ -722,7 +3264,7 @@ class AddonUpdatePreferences:
             else:
                 icon = 'URL'
 
-            values.operator(AddonUpdateCheck.bl_idname,
+            values.operator(_get_operator_idname(self.bl_idname, AddonUpdateCheck),
                             icon=icon,
                             text="Check for update",
                             depress=(status == 'CHECKING'))
@@ -740,6 +3282,13 @@ class AddonUpdatePreferences:
             row.label(text="Check at startup:")
             row.prop(self, "check_for_updates_on_startup", text="")
 
+            row = values.row()
+            row.alignment = 'RIGHT'
+            row.label(text="Download in background:")
+            if self.prefetch_updates:
+                row.prop(self, "prefetch_rate_limit", text="KiB/s")
+            row.prop(self, "prefetch_updates", text="")
+
             labels.separator(factor=0.5)
             values.separator(factor=0.5)
             
@@ -747,14 +3296,14 @@ class AddonUpdatePreferences:
                 column = values.column(align=True)
                 column.box().row().label(icon='ERROR', text="Update Failed")
                 column.box().label(text=self.update_error)
-                column.box().operator(AddonUpdateReset.bl_idname, text="OK")
+                column.box().operator(_get_operator_idname(self.bl_idname, AddonUpdateReset), text="OK")
 
             elif status == 'NO_UPDATE':
                 column = values.column(align=True)
                 column.box().row().label(icon='PLUGIN', text="No Update Available")
                 column.box().label(text="You currently have the latest compatible version installed")
 
-            elif status in {'AVAILABLE', 'DOWNLOADING', 'READY', 'INSTALLING'}:
+            elif status in {'AVAILABLE', 'DOWNLOADING', 'VALIDATING', 'READY', 'INSTALLING'}:
                 column = values.column(align=True)
 
                 row = column.box().row()
@@ -763,7 +3312,7 @@ class AddonUpdatePreferences:
 
                 subrow = row.row()
                 subrow.alignment = 'RIGHT'
-                subrow.operator(AddonUpdateReset.bl_idname,
+                subrow.operator(_get_operator_idname(self.bl_idname, AddonUpdateReset),
                                 text="",
                                 icon='X',
                                 emboss=False)
@@ -791,50 +3340,498 @@ class AddonUpdatePreferences:
                 row = box.row()
 
                 if status == 'AVAILABLE':
-                    row.operator(AddonUpdateDownload.bl_idname,
+                    row.operator(_get_operator_idname(self.bl_idname, AddonUpdateDownload),
                                  icon='IMPORT',
                                  text="Download")
 
                 elif status == 'DOWNLOADING':
                     row.enabled = False
-                    row.operator(AddonUpdateDownload.bl_idname,
+                    row.operator(_get_operator_idname(self.bl_idname, AddonUpdateDownload),
                                  icon=self._progress_icon(),
                                  text="Dowload",
                                  depress=True)
+                    box.row().label(text=self._download_progress_text())
+
+                elif status == 'VALIDATING':
+                    row.enabled = False
+                    row.operator(_get_operator_idname(self.bl_idname, AddonUpdateDownload),
+                                 icon=self._progress_icon(),
+                                 text="Validating",
+                                 depress=True)
+
+                elif status == 'INSTALLING':
+                    row.enabled = False
+                    row.operator(_get_operator_idname(self.bl_idname, AddonUpdateInstall),
+                                 icon='FILE_REFRESH',
+                                 text="Installing",
+                                 depress=True)
 
                 else:# status == 'READY':
-                    row.operator(AddonUpdateInstall.bl_idname,
+                    row.operator(_get_operator_idname(self.bl_idname, AddonUpdateInstall),
                                  icon='FILE_REFRESH',
                                  text="Update")
 
 
-def _on_startup_update_check_complete(handler: AddonUpdateCheckHandler) -> None:
-    prefs = _get_addon_preferences()
+def _release_addon_operation(name: str, handler: Any) -> bool:
+    # A handler replaced or cancelled since it was started no longer owns the status.
+    # Returns False for those so their result is ignored.
+    if _addon_operations.get(name) is not handler:
+        return False
+    del _addon_operations[name]
+    _stop_spinner(name)
+    return True
+
+
+def _create_download_handler(name: str,
+                             prefs: 'AddonUpdatePreferences',
+                             callback: Callable[[AddonUpdateDownloadHandler], None],
+                             **kwargs: Any) -> AddonUpdateDownloadHandler:
+    key = f'{name}-{prefs.new_release_version}' if prefs.new_release_version else ""
+
+    release = _get_release_data(name)
+    manifest = release.get("manifest")
+    mirrors = release.get("mirrors")
+    mod = _get_addon_module(name) if manifest or _stream_extract else None
+    addon_path = os.path.dirname(mod.__file__) if mod else ""
+    extract_path = _get_addon_staging_path(addon_path, "download") if addon_path and _stream_extract else ""
+
+    if "progress_callback" not in kwargs:
+        kwargs["progress_callback"] = _main_thread_callback(_on_download_progress, name, final=False)
+
+    return AddonUpdateDownloadHandler(prefs.new_release_url,
+                                      callback,
+                                      key=key,
+                                      manifest=manifest,
+                                      addon_path=addon_path,
+                                      sha256=prefs.new_release_hash,
+                                      size=int(prefs.new_release_size),
+                                      extract_path=extract_path,
+                                      package=name,
+                                      mirrors=mirrors if isinstance(mirrors, list) else None,
+                                      **kwargs)
+
+
+def _start_prefetch(name: str, prefs: 'AddonUpdatePreferences') -> None:
+    # Downloads and validates the available release under the bandwidth limit so
+    # AddonUpdateDownload can go straight to READY. The operator takes over a prefetch
+    # that is still running.
+    version = prefs.new_release_version
+    if _prefetched_releases.get(name, ("", ""))[0] != version:
+        _prefetched_releases.pop(name, None)
+    if _prefetch_operations.get(name, ("", None))[0] != version:
+        _cancel_prefetch(name)
+
+    if not prefs.prefetch_updates or name in _prefetch_operations or name in _prefetched_releases:
+        return
+
+    handler = _create_download_handler(name,
+                                       prefs,
+                                       _main_thread_callback(_on_prefetch_complete, name, version),
+                                       rate_limit=prefs.prefetch_rate_limit * 1024.0,
+                                       timeout=0.0)
+    _prefetch_operations[name] = (version, handler)
+    handler.run()
+
+
+def _cancel_prefetch(name: str) -> None:
+    _, handler = _prefetch_operations.pop(name, ("", None))
+    if handler is not None:
+        handler.cancel()
+
+
+def _release_prefetch(name: str, handler: Any) -> bool:
+    # Returns False when AddonUpdateDownload has taken the handler over
+    if _prefetch_operations.get(name, ("", None))[1] is handler:
+        del _prefetch_operations[name]
+    return _addon_operations.get(name) is not handler
+
+
+def _on_prefetch_complete(name: str, version: str, handler: AddonUpdateDownloadHandler) -> None:
+    if not _release_prefetch(name, handler):
+        _on_download_complete(name, handler)
+        return
+
+    error = handler.error
+    prefs = _get_addon_preferences(name)
+    if error or prefs is None or prefs.new_release_version != version:
+        if error and not isinstance(error, _OperationCancelled):
+            print(error)
+        return
+
+    path = handler.path
+    if os.path.isdir(path):
+        _prefetched_releases[name] = (version, path)
+        return
+
+    validator = AddonUpdateValidationHandler(path,
+                                             name,
+                                             handler.sha256,
+                                             _main_thread_callback(_on_prefetch_validated, name, version),
+                                             trace=handler.trace)
+    _prefetch_operations[name] = (version, validator)
+    validator.run()
+
+
+def _on_prefetch_validated(name: str, version: str, handler: AddonUpdateValidationHandler) -> None:
+    if not _release_prefetch(name, handler):
+        _on_validation_complete(name, handler)
+        return
+
+    error = handler.error
+    if error:
+        if not isinstance(error, _OperationCancelled):
+            print(error)
+        return
+
+    _prefetched_releases[name] = (version, handler.path)
+
+
+def _on_update_check_complete(name: str, handler: AddonUpdateCheckHandler) -> None:
+    if not _release_addon_operation(name, handler):
+        return
+    prefs = _get_addon_preferences(name)
+    if prefs is None or prefs.update_status != 'CHECKING':
+        return
+
     error = handler.error
     if error:
-        _reset_update_status(prefs)
+        prefs.update_status = 'ERROR'
+        prefs.update_error = str(error)
+        return
+
+    data = handler.data
+    if not data.get("url", ""):
+        prefs.update_status = 'NO_UPDATE'
+        return
+
+    _assign_update_check_response_params(name, prefs, data)
+    _start_prefetch(name, prefs)
+
+
+def _on_download_progress(name: str, handler: AddonUpdateDownloadHandler) -> None:
+    prefs = _get_addon_preferences(name)
+    if prefs is not None and prefs.update_status == 'DOWNLOADING':
+        if handler.total:
+            _event_spinners.pop(name, None)
+            prefs.update_progress = handler.progress
+        prefs.update_bytes_received = handler.received
+        prefs.update_bytes_total = handler.total
+        prefs.update_throughput = handler.throughput
+        prefs.update_eta = handler.eta
+
+
+def _on_download_complete(name: str, handler: AddonUpdateDownloadHandler) -> None:
+    if not _release_addon_operation(name, handler):
+        return
+    prefs = _get_addon_preferences(name)
+    if prefs is None or prefs.update_status != 'DOWNLOADING':
+        return
+
+    _reset_download_progress(prefs)
+
+    error = handler.error
+    if error:
+        prefs.update_status = 'ERROR'
+        prefs.update_error = str(error)
+        return
+
+    path = handler.path
+    prefs.new_release_path = _download_cache_pinned[name] = path
+
+    # Streamed extraction already checked every member while writing it
+    if os.path.isdir(path):
+        prefs.update_status = 'READY'
+        return
+
+    prefs.update_status = 'VALIDATING'
+    _start_spinner(name)
+    validator = AddonUpdateValidationHandler(path,
+                                             name,
+                                             handler.sha256,
+                                             _main_thread_callback(_on_validation_complete, name),
+                                             trace=handler.trace)
+    _addon_operations[name] = validator
+    validator.run()
+
+
+def _on_validation_complete(name: str, handler: AddonUpdateValidationHandler) -> None:
+    if not _release_addon_operation(name, handler):
+        return
+    prefs = _get_addon_preferences(name)
+    if prefs is None or prefs.update_status != 'VALIDATING':
+        return
+
+    error = handler.error
+    if error:
+        prefs.update_status = 'ERROR'
+        prefs.update_error = str(error)
     else:
-        _assign_update_check_response_params(prefs, handler.data)
-        func = _resolve_operator_function(AddonUpdateAvailable)
+        prefs.update_status = 'READY'
+
+
+def _apply_startup_update_check_result(name: str, data: Any) -> None:
+    prefs = _get_addon_preferences(name)
+    if prefs is None:
+        return
+
+    if isinstance(data, str):
+        data = {"url": data}
+
+    if isinstance(data, dict) and data.get("url"):
+        _assign_update_check_response_params(name, prefs, data)
+        _start_prefetch(name, prefs)
+        func = _resolve_operator_function(name, AddonUpdateAvailable)
         if func:
             func('INVOKE_DEFAULT')
 
 
-def _on_startup():
-    if _can_update():
-        prefs = _get_addon_preferences()
+def _on_startup_update_check_complete(name: str, handler: AddonUpdateCheckHandler) -> None:
+    error = handler.error
+    if error:
+        prefs = _get_addon_preferences(name)
+        if prefs is not None:
+            _reset_update_status(prefs)
+    else:
+        _apply_startup_update_check_result(name, handler.data)
+
+
+def _on_startup_batch_update_check_complete(names: List[str], handler: AddonUpdateCheckHandler) -> None:
+    # A batched response maps each addon name to what the single addon request would
+    # have returned, either directly or under "addons" (as a mapping or a list in request
+    # order). Servers that reject batched requests are asked for each addon in turn.
+    import urllib.error
+    error = handler.error
+    data = handler.data
+
+    if ((isinstance(error, urllib.error.HTTPError) and error.code in {400, 404, 405, 501})
+        or (data is not None and "url" in data)):
+        for name in names:
+            _run_startup_update_check(name)
+        return
+
+    if error:
+        for name in names:
+            prefs = _get_addon_preferences(name)
+            if prefs is not None:
+                _reset_update_status(prefs)
+        return
+
+    results = data.get("addons", data)
+    if isinstance(results, list):
+        results = dict(zip(names, results))
+
+    for name in names:
+        _apply_startup_update_check_result(name, results.get(name) if isinstance(results, dict) else None)
+
+
+def _get_startup_update_check_params(name: str) -> Optional[Tuple['AddonUpdatePreferences', Tuple[int, int, int]]]:
+    if _can_update(name):
+        prefs = _get_addon_preferences(name)
         if (prefs
             and prefs.get("check_for_updates_on_startup", False)
             and prefs.get("api_token", "")
             ):
-            version = _get_addon_info_value("version")
+            version = _get_addon_info_value(name, "version")
             if _validate_version_tuple(version):
-                url = _encode_request_url(_get_request_params(prefs, version))
-                AddonUpdateCheckHandler(url, _on_startup_update_check_complete).run()
+                return prefs, version
+
+
+def _run_startup_update_check(name: str) -> None:
+    item = _get_startup_update_check_params(name)
+    if item:
+        url = _get_update_check_url(name)
+        trace = _new_trace_id()
+        with _TraceSpan("url_encode", trace, addon=name):
+            params = _get_request_params(name, *item)
+            request_url = _encode_request_url(url, params)
+        AddonUpdateCheckHandler(request_url,
+                                _main_thread_callback(_on_startup_update_check_complete, name),
+                                cache_key=_get_check_cache_key(url, params),
+                                max_age=_check_cache_ttl,
+                                trace=trace,
+                                mirrors=_get_update_check_mirrors(name, params)).run()
+
+
+def _on_startup() -> None:
+    groups: Dict[str, List[Tuple[str, 'AddonUpdatePreferences', Tuple[int, int, int]]]] = {}
+
+    for name, entry in list(_registry.items()):
+        if not entry.startup_checked:
+            entry.startup_checked = True
+            item = _get_startup_update_check_params(name)
+            if item:
+                groups.setdefault(entry.url, []).append((name, *item))
+
+    for url, items in groups.items():
+        if len(items) == 1:
+            _run_startup_update_check(items[0][0])
+        else:
+            names = [item[0] for item in items]
+            trace = _new_trace_id()
+            with _TraceSpan("url_encode", trace, addon=",".join(names)):
+                params = _get_batch_request_params(items)
+                request_url = _encode_request_url(url, params)
+            AddonUpdateCheckHandler(request_url,
+                                    _main_thread_callback(_on_startup_batch_update_check_complete, names),
+                                    cache_key=_get_check_cache_key(url, params),
+                                    max_age=_check_cache_ttl,
+                                    trace=trace,
+                                    mirrors=_get_update_check_mirrors(names[0], params)).run()
+
+
+# Exit codes of run_headless, the first that applies to any of the addons wins
+HEADLESS_FAILED = 1     # checking, downloading or installing an update failed
+HEADLESS_INVALID = 2    # the addon is not registered or has no API token or valid version
+HEADLESS_READY = 3      # an update was downloaded and validated but install was False
+HEADLESS_OK = 0         # every addon is up to date or was updated
+
+
+def _run_blocking(create: Callable[[Callable[[Any], None]], Any]) -> Any:
+    done = threading.Event()
+    handler = create(lambda _: done.set())
+    handler.run()
+    done.wait()
+    if handler.error:
+        raise handler.error
+    return handler
+
+
+def _run_headless_update(name: str, install: bool, timeout: Optional[float]) -> int:
+    prefs = _get_addon_preferences(name)
+    url = _get_update_check_url(name)
+    version = _get_addon_info_value(name, "version")
+    if not url or not isinstance(prefs, AddonUpdatePreferences):
+        print(f'{name}: not registered for updates')
+        return HEADLESS_INVALID
+    if not prefs.api_token:
+        print(f'{name}: no API token set')
+        return HEADLESS_INVALID
+    if not _validate_version_tuple(version):
+        print(f'{name}: invalid bl_info.version')
+        return HEADLESS_INVALID
+
+    trace = _new_trace_id()
+    try:
+        with _TraceSpan("url_encode", trace, addon=name):
+            params = _get_request_params(name, prefs, version)
+            request_url = _encode_request_url(url, params)
+        check = _run_blocking(lambda callback: AddonUpdateCheckHandler(
+            request_url,
+            callback,
+            cache_key=_get_check_cache_key(url, params),
+            timeout=timeout,
+            trace=trace,
+            mirrors=_get_update_check_mirrors(name, params)))
+
+        data = check.data
+        if not data.get("url", ""):
+            prefs.update_status = 'NO_UPDATE'
+            print(f'{name}: {_version_tuple_to_string(version)} is up to date')
+            return HEADLESS_OK
+
+        _assign_update_check_response_params(name, prefs, data)
+        release = prefs.new_release_version or prefs.new_release_url
+        print(f'{name}: downloading {release}')
+        download = _run_blocking(lambda callback: _create_download_handler(
+            name, prefs, callback, progress_callback=None, timeout=timeout, trace=trace))
+
+        path = download.path
+        if not os.path.isdir(path):
+            _run_blocking(lambda callback: AddonUpdateValidationHandler(
+                path, name, download.sha256, callback, trace=trace))
+        prefs.new_release_path = _download_cache_pinned[name] = path
+        prefs.update_status = 'READY'
+
+        if not install:
+            print(f'{name}: {release} is ready to install')
+            return HEADLESS_READY
+
+        mod = _get_addon_module(name)
+        if mod is None:
+            raise RuntimeError("Failed to find addon directory")
+
+        prefs.update_status = 'INSTALLING'
+        handler = AddonUpdateInstallHandler(name,
+                                            path,
+                                            os.path.dirname(mod.__file__),
+                                            _version_tuple_to_string(version),
+                                            trace=trace)
+        handler.run(blocking=True)
+        if handler.error:
+            raise handler.error
+    except Exception as err:
+        print(f'{name}: update failed ({err})')
+        with suppress(Exception):
+            prefs.update_status = 'ERROR'
+            prefs.update_error = str(err)
+        return HEADLESS_FAILED
+
+    print(f'{name}: updated {_version_tuple_to_string(version)} to {release}')
+    return HEADLESS_OK
+
+
+def run_headless(names: Optional[Union[str, List[str]]]=None,
+                 install: Optional[bool]=True,
+                 timeout: Optional[float]=None) -> int:
+    # Checks, downloads, validates and installs updates for the given addons registered
+    # with this module, or all of them, one after another without any UI. Made for
+    # blender --background, where the operators and timers never run:
+    #
+    #   blender -b --python-expr "import sys, my_addon.update as u; sys.exit(u.run_headless())"
+    #
+    # Returns one of the HEADLESS_ exit codes.
+    if isinstance(names, str):
+        names = [names]
+    results = [_run_headless_update(name, bool(install), timeout) for name in names or list(_registry)]
+    for code in (HEADLESS_FAILED, HEADLESS_INVALID, HEADLESS_READY):
+        if code in results:
+            return code
+    return HEADLESS_OK
+
+
+def _can_update(name: str) -> bool:
+    return bool(_get_update_check_url(name))
+
 
+def _get_update_check_url(name: str) -> str:
+    entry = _registry.get(name)
+    return entry.url if entry is not None else ""
 
-def _can_update() -> bool:
-    return bool(_addon_module_name and _update_check_url)
+
+def _get_update_check_mirrors(name: str, params: Dict[str, str]) -> List[str]:
+    entry = _registry.get(name)
+    return [_encode_request_url(url, params) for url in entry.mirrors] if entry is not None else []
+
+
+def _get_release_data(name: str) -> Dict[str, Any]:
+    # The full response of the last update check. It is only kept in memory, so after a
+    # restart optional extras such as the differential manifest are unavailable.
+    entry = _registry.get(name)
+    prefs = _get_addon_preferences(name)
+    if entry is not None and prefs is not None and entry.release.get("url") == prefs.new_release_url:
+        return entry.release
+    return {}
+
+
+def _get_operator_idname(name: str, op: Type[Operator]) -> str:
+    entry = _registry.get(name)
+    if entry is not None and op in entry.idnames:
+        return entry.idnames[op]
+    return f'{name}.{"".join(f"_{c}" if c.isupper() and i else c for i, c in enumerate(op.__name__)).lower()}'
+
+
+class _AddonRegistration:
+
+    def __init__(self, name: str, url: Union[str, List[str]]) -> None:
+        urls = [url] if isinstance(url, str) else list(url)
+        urls = [url for url in dict.fromkeys(urls) if url]
+        self.name = name
+        self.url = urls[0] if urls else ""
+        self.mirrors = urls[1:]
+        self.classes: List[Type[Operator]] = []
+        self.idnames: Dict[Type[Operator], str] = {}
+        self.startup_checked = False
+        self.release: Dict[str, Any] = {}
 
 
 CLASSES = [
@@ -845,31 +3842,128 @@ CLASSES = [
     AddonUpdateAvailable,
     ]
 
-def register(name: str, url: Optional[str]="") -> None:
-
-    global _addon_module_name
-    _addon_module_name = name
-
-    global _update_check_url
-    _update_check_url = url
-
+def register(name: str,
+             url: Optional[Union[str, List[str]]]="",
+             download_chunk_size: Optional[int]=None,
+             cache_directory: Optional[str]=None,
+             download_segments: Optional[int]=None,
+             check_cache_ttl: Optional[float]=None,
+             backup_mode: Optional[str]=None,
+             backup_limit: Optional[int]=None,
+             backup_max_size: Optional[int]=None,
+             stream_extract: Optional[bool]=None,
+             max_workers: Optional[int]=None,
+             check_timeout: Optional[float]=None,
+             download_timeout: Optional[float]=None,
+             trace_log: Optional[str]=None,
+             mirror_race_count: Optional[int]=None,
+             mirror_stagger: Optional[float]=None,
+             download_cache_size: Optional[int]=None) -> None:
+    # May be called once for each addon sharing this copy of the module. The optional
+    # settings are module wide and only changed when given.
+
+    if download_chunk_size is not None:
+        global _download_chunk_size
+        _download_chunk_size = max(int(download_chunk_size), 1024)
+
+    if cache_directory is not None:
+        global _cache_directory
+        _cache_directory = cache_directory
+
+    if download_segments is not None:
+        global _download_segments
+        _download_segments = max(int(download_segments), 1)
+
+    if check_cache_ttl is not None:
+        global _check_cache_ttl
+        _check_cache_ttl = max(float(check_cache_ttl), 0.0)
+
+    if backup_mode is not None:
+        if backup_mode not in {'RENAME', 'HARDLINK', 'NONE'}:
+            raise ValueError(f'Invalid backup_mode "{backup_mode}"')
+        global _backup_mode
+        _backup_mode = backup_mode
+
+    if backup_limit is not None:
+        global _backup_limit
+        _backup_limit = max(int(backup_limit), 1)
+
+    if backup_max_size is not None:
+        global _backup_max_size
+        _backup_max_size = max(int(backup_max_size), 0)
+
+    if stream_extract is not None:
+        global _stream_extract
+        _stream_extract = bool(stream_extract)
+
+    if max_workers is not None:
+        # Applies once the executor is next started
+        global _worker_max
+        _worker_max = max(int(max_workers), 1)
+
+    if check_timeout is not None:
+        global _check_timeout
+        _check_timeout = max(float(check_timeout), 0.0)
+
+    if download_timeout is not None:
+        global _download_timeout
+        _download_timeout = max(float(download_timeout), 0.0)
+
+    if trace_log is not None:
+        # Spans are appended to this file as JSON lines, an empty string turns it off
+        global _trace_log
+        _trace_log = trace_log
+
+    if mirror_race_count is not None:
+        global _mirror_race_count
+        _mirror_race_count = max(int(mirror_race_count), 1)
+
+    if mirror_stagger is not None:
+        global _mirror_stagger
+        _mirror_stagger = max(float(mirror_stagger), 0.0)
+
+    if download_cache_size is not None:
+        # Total size of cached release archives in bytes, 0 turns the cache off
+        global _download_cache_size
+        _download_cache_size = max(int(download_cache_size), 0)
+
+    if name in _registry:
+        unregister(name)
+
+    entry = _AddonRegistration(name, url or "")
     for cls in CLASSES:
-        cls.bl_idname = f'{name}.{_opname_pattern.sub("_", cls.__name__).lower()}'
-        bpy.utils.register_class(cls)
+        idname = _get_operator_idname(name, cls)
+        subclass = type(cls.__name__, (cls,), {"bl_idname": idname, "_addon_name": name})
+        bpy.utils.register_class(subclass)
+        entry.classes.append(subclass)
+        entry.idnames[cls] = idname
+    _registry[name] = entry
+
+    # The module index is built on the first lookup rather than on Blender's startup path
+    _install_modules_refresh_hook()
 
     if not bpy.app.timers.is_registered(_on_startup):
         bpy.app.timers.register(_on_startup, first_interval=5)
 
-def unregister() -> None:
-
-    global _addon_module_name
-    _addon_module_name = ""
-
-    global _update_check_url
-    _update_check_url = ""
-
-    if bpy.app.timers.is_registered(_on_startup):
-        bpy.app.timers.unregister(_on_startup)
-
-    for cls in reversed(CLASSES):
-        bpy.utils.unregister_class(cls)
+def unregister(name: Optional[str]=None) -> None:
+
+    for key in ([name] if name else list(_registry)):
+        entry = _registry.pop(key, None)
+        if entry is not None:
+            for cls in reversed(entry.classes):
+                bpy.utils.unregister_class(cls)
+
+    if not _registry:
+        if bpy.app.timers.is_registered(_on_startup):
+            bpy.app.timers.unregister(_on_startup)
+
+        _cancel_mirror_races()
+        _shutdown_workers()
+        _addon_operations.clear()
+        _prefetch_operations.clear()
+        _prefetched_releases.clear()
+        _stop_event_dispatch()
+        _connection_pool.clear()
+        _remove_modules_refresh_hook()
+        _invalidate_addon_module_index()
+        _addon_module_index.clear()
@@ -0,0 +1,114 @@
+# Measures several processes downloading the same release at once, as farm nodes and
+# multi-instance workstations do at startup. Every worker is a fresh interpreter with
+# the stub bpy. With a shared cache directory the download lock lets one worker fetch
+# the release while the others wait and reuse it; with separate cache directories each
+# worker fetches it on its own.
+#
+#   python benchmarks/contention.py [--workers 8] [--size BYTES] [--stale]
+#
+# --stale leaves a lock behind from a process that no longer exists before the workers
+# start, which the first of them has to break.
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from server import UpdateServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "benchmarks", "stubs")
+
+WORKER = r'''
+import importlib.util, json, sys, threading, time
+sys.path.insert(0, {stubs!r})
+import bpy, addon_utils
+spec = importlib.util.spec_from_file_location("addon_update", {init!r}, submodule_search_locations=[{package!r}])
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+spec.loader.exec_module(module)
+module.register("bench_addon", "", cache_directory={cache!r})
+while time.time() < {start!r}:
+    time.sleep(0.001)
+done = threading.Event()
+start = time.perf_counter()
+handler = module.AddonUpdateDownloadHandler({url!r}, callback=lambda _: done.set(), key="bench_addon-1.0.0")
+handler.run()
+done.wait()
+elapsed = time.perf_counter() - start
+if handler.error:
+    raise handler.error
+print(json.dumps({{"elapsed": elapsed, "cached": handler.cached, "sha256": handler.sha256}}))
+'''
+
+
+def make_stale_lock(cache):
+    # Owned by a process on this host which has already exited
+    process = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                             check=True, capture_output=True, text=True)
+    os.makedirs(os.path.join(cache, "locks"), exist_ok=True)
+    with open(os.path.join(cache, "locks", "bench_addon-1.0.0.lock"), "w") as file:
+        json.dump({"token": "stale", "host": socket.gethostname(), "pid": int(process.stdout), "time": 0.0}, file)
+
+
+def run_workers(server, url, root, workers, shared, stale):
+    caches = [os.path.join(root, "shared" if shared else f"worker-{index}") for index in range(workers)]
+    if stale:
+        for cache in set(caches):
+            make_stale_lock(cache)
+    start = time.time() + 0.5 + workers * 0.05
+    processes = [subprocess.Popen([sys.executable, "-S", "-c", WORKER.format(stubs=STUBS,
+                                                                             package=ROOT,
+                                                                             init=os.path.join(ROOT, "__init__.py"),
+                                                                             cache=cache,
+                                                                             start=start,
+                                                                             url=url)],
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                 for cache in caches]
+    results = []
+    for process in processes:
+        stdout, stderr = process.communicate()
+        if process.returncode:
+            raise RuntimeError(f"Worker failed\n{stderr}")
+        results.append(json.loads(stdout.strip().splitlines()[-1]))
+    wall = max(result["elapsed"] for result in results)
+    if len({result["sha256"] for result in results}) != 1:
+        raise RuntimeError("Workers downloaded different files")
+    return dict(server.stats(reset=True),
+                name="shared" if shared else "separate",
+                workers=workers,
+                stale_lock=stale,
+                fetched=sum(not result["cached"] for result in results),
+                wall_ms=wall * 1000.0,
+                median_ms=statistics.median(result["elapsed"] for result in results) * 1000.0)
+
+
+def measure(workers, size, stale=False):
+    root = tempfile.mkdtemp(prefix="bl_addon_update_concurrent_")
+    server = UpdateServer().start()
+    try:
+        url = f"{server.url}/files/{size}"
+        server.stats(reset=True)
+        return [run_workers(server, url, root, workers, shared, stale) for shared in (False, True)]
+    finally:
+        server.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--size", type=int, default=32 * 1024 * 1024)
+    parser.add_argument("--stale", action="store_true", help="Start with a stale lock from a dead process")
+    args = parser.parse_args()
+    print(json.dumps(measure(args.workers, args.size, args.stale), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
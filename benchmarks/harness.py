@@ -0,0 +1,91 @@
+# Helpers shared by the benchmarks for running the package outside Blender against the
+# stub bpy and addon_utils modules in benchmarks/stubs.
+import importlib.util
+import os
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "benchmarks", "stubs")
+
+if STUBS not in sys.path:
+    sys.path.insert(0, STUBS)
+
+import addon_utils
+import bpy
+
+
+def load_package(package=ROOT, name="addon_update"):
+    spec = importlib.util.spec_from_file_location(name,
+                                                  os.path.join(package, "__init__.py"),
+                                                  submodule_search_locations=[package])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_preferences(module, name):
+    # Instances of the mixin with every property set to its default, standing in for
+    # the AddonPreferences Blender would create
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def setitem(self, key, value):
+        setattr(self, key, value)
+
+    cls = type("Preferences", (module.AddonUpdatePreferences,), {
+        "bl_idname": name,
+        "layout": None,
+        "get": get,
+        "__setitem__": setitem,
+        })
+    prefs = cls()
+    for key, (_, kwargs) in module.AddonUpdatePreferences.__annotations__.items():
+        setattr(prefs, key, kwargs.get("default"))
+    return prefs
+
+
+def add_addon(module, name, path, version=(1, 0, 0)):
+    addon_utils.addons_fake_modules[name] = types.SimpleNamespace(
+        __name__=name,
+        __file__=os.path.join(path, "__init__.py"),
+        bl_info={"name": name, "version": version})
+    prefs = make_preferences(module, name)
+    bpy.context.preferences.addons[name] = types.SimpleNamespace(preferences=prefs)
+    module._invalidate_addon_module_index()
+    return prefs
+
+
+def run_timers(timeout=60.0):
+    # Runs registered bpy.app.timers functions until none are left, ignoring their
+    # requested intervals
+    timers = bpy.app.timers
+    deadline = time.monotonic() + timeout
+    while timers.functions and time.monotonic() < deadline:
+        for function in list(timers.functions):
+            timers.functions.pop(function, None)
+            interval = function()
+            if interval is not None:
+                timers.functions[function] = interval
+
+
+class Layout:
+    # Records nothing, only provides the UILayout calls the preferences draw makes
+
+    def __init__(self):
+        self.alignment = 'EXPAND'
+        self.enabled = True
+        self.calls = 0
+
+    def _child(self, *args, **kwargs):
+        self.calls += 1
+        return Layout()
+
+    row = column = box = split = _child
+
+    def label(self, *args, **kwargs):
+        self.calls += 1
+
+    prop = operator = separator = label
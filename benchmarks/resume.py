@@ -0,0 +1,83 @@
+# Checks that an interrupted download resumes. The local server drops the connection
+# part way through the first response. The next attempt must ask for the remainder with
+# Range and If-Range and end up with a file identical to the one served.
+#
+#   python benchmarks/resume.py [--size BYTES] [--drop BYTES]
+#
+# Exits with 1 when the download did not resume or the file differs.
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import urllib.request
+
+import harness
+from server import UpdateServer
+
+
+def download(module, url):
+    done = threading.Event()
+    handler = module.AddonUpdateDownloadHandler(url, callback=lambda _: done.set(), key="resume", segments=1)
+    handler.run()
+    done.wait(60.0)
+    return handler
+
+
+def check(size, drop):
+    root = tempfile.mkdtemp(prefix="bl_addon_update_resume_")
+    module = harness.load_package()
+    module.register("resume", "", cache_directory=root, download_cache_size=0)
+    server = UpdateServer().start()
+    failures = []
+    try:
+        url = f"{server.url}/files/{size}"
+        with urllib.request.urlopen(url) as resp:
+            expected = hashlib.sha256(resp.read()).hexdigest()
+
+        server.drop_files_after(drop)
+        first = download(module, url)
+        if first.error is None:
+            failures.append("first attempt completed although the connection was dropped")
+        part = os.path.join(root, "staging", "resume.part")
+        if not os.path.isfile(part) or os.path.getsize(part) != drop:
+            failures.append(f"partial download not kept ({os.path.getsize(part) if os.path.isfile(part) else 0} of {drop} bytes)")
+
+        second = download(module, url)
+        headers = server.request_log[-1][1]
+        if second.error is not None:
+            failures.append(f"second attempt failed: {second.error}")
+        elif second.offset != drop:
+            failures.append(f"second attempt started at {second.offset}, expected {drop}")
+        if headers.get("Range") != f"bytes={drop}-":
+            failures.append(f"second attempt sent Range {headers.get('Range')!r}")
+        if headers.get("If-Range") != f'"{size}"':
+            failures.append(f"second attempt sent If-Range {headers.get('If-Range')!r}")
+        if second.path and hashlib.sha256(open(second.path, "rb").read()).hexdigest() != expected:
+            failures.append("resumed file differs from the served file")
+    finally:
+        server.stop()
+        module.unregister()
+        shutil.rmtree(root, ignore_errors=True)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=4 * 1024 * 1024 + 123)
+    parser.add_argument("--drop", type=int, default=1024 * 1024 + 7)
+    args = parser.parse_args()
+
+    failures = check(args.size, args.drop)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    if failures:
+        return 1
+    print(f"Resumed a {args.size} byte download from byte {args.drop}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
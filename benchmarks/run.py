@@ -0,0 +1,369 @@
+# Offline benchmark suite. Runs the package against the stub bpy and a local update
+# server and writes the results as JSON.
+#
+#   python benchmarks/run.py [--quick] [--output results.json]
+#   python benchmarks/run.py --compare baseline.json [--tolerance 0.25]
+#
+# Measures update check latency, check transfer size and time with each content
+# encoding, download throughput at several file sizes with and without the download
+# cache, backup and install time at several addon sizes, AddonUpdatePreferences.draw
+# time, startup cost and several processes downloading one release. --compare exits
+# with 1 when any metric regressed by more than --tolerance.
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+import contention
+import harness
+import startup
+from server import UpdateServer
+
+MIB = 1024 * 1024
+
+FULL = {
+    "samples": 5,
+    "releases": [10, 200, 2000],
+    "check_rate": 256 * 1024,
+    "download_sizes": [1 * MIB, 16 * MIB, 64 * MIB],
+    "download_segments": [1, 4],
+    "addons": [(10, 4096), (200, 4096), (1000, 4096), (20, 1 * MIB)],
+    "draw_iterations": 2000,
+    "startup_samples": 10,
+    "contention_workers": 8,
+    "contention_size": 32 * MIB,
+    }
+
+QUICK = {
+    "samples": 3,
+    "releases": [10, 200],
+    "check_rate": 256 * 1024,
+    "download_sizes": [1 * MIB, 8 * MIB],
+    "download_segments": [1, 4],
+    "addons": [(10, 4096), (200, 4096)],
+    "draw_iterations": 200,
+    "startup_samples": 3,
+    "contention_workers": 4,
+    "contention_size": 8 * MIB,
+    }
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "samples": len(samples),
+        "median_ms": statistics.median(samples) * 1000.0,
+        "min_ms": samples[0] * 1000.0,
+        "p95_ms": samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000.0,
+        }
+
+
+def run_handler(cls, *args, timeout=600.0, **kwargs):
+    done = threading.Event()
+    handler = cls(*args, callback=lambda _: done.set(), **kwargs)
+    start = time.perf_counter()
+    handler.run()
+    if not done.wait(timeout):
+        raise RuntimeError(f"{cls.__name__} did not complete within {timeout} seconds")
+    elapsed = time.perf_counter() - start
+    if handler.error:
+        raise handler.error
+    return elapsed, handler
+
+
+def bench_check(module, server, samples):
+    url = f"{server.url}/check"
+    results = []
+    for name, cache_key, max_age in (("cold", "", 0.0),
+                                     ("revalidated", "bench", 0.0),
+                                     ("cached", "bench", 3600.0)):
+        times = [run_handler(module.AddonUpdateCheckHandler, url, cache_key=cache_key, max_age=max_age)[0]
+                 for _ in range(samples + 1)]
+        # The first request opens the connection or fills the cache
+        results.append(dict(summarize(times[1:]), name=name))
+    return results
+
+
+def make_release_list(count):
+    return {"url": "", "version": "1.2.3", "releases": [{
+        "version": f"1.{index // 10}.{index % 10}",
+        "date": f"2026{index % 12 + 1:02d}{index % 28 + 1:02d}",
+        "notes": f"https://example.com/addon/releases/1.{index // 10}.{index % 10}",
+        "url": f"https://example.com/addon/download/addon-1.{index // 10}.{index % 10}.zip",
+        "sha256": f"{index:064x}",
+        "size": 1000000 + index * 7919,
+        } for index in range(count)]}
+
+
+def bench_compression(module, server, releases, rate, samples):
+    # Update checks of increasingly long release lists, sent with each encoding over a
+    # link limited to rate bytes per second. Wire bytes come from the body_read spans.
+    url = f"{server.url}/check"
+    results = []
+    spans = []
+    module.add_trace_callback(spans.append)
+    try:
+        for count in releases:
+            server.set_check_response(make_release_list(count))
+            for encoding in ("identity", "gzip", "deflate"):
+                server.set_check_encoding(encoding, rate)
+                times = []
+                for _ in range(samples + 1):
+                    spans.clear()
+                    elapsed, handler = run_handler(module.AddonUpdateCheckHandler, url)
+                    times.append(elapsed)
+                    if len(handler.result["releases"]) != count:
+                        raise RuntimeError(f"{encoding} check returned the wrong release list")
+                span = next(span for span in spans if span["span"] == "body_read")
+                result = summarize(times[1:])
+                result.update(name=f"{count}-{encoding}", releases=count, encoding=encoding,
+                              wire_bytes=span["bytes"],
+                              body_bytes=span.get("decoded_bytes", span["bytes"]))
+                results.append(result)
+    finally:
+        module.remove_trace_callback(spans.append)
+        server.set_check_encoding("identity")
+        server.set_check_response({"url": "", "version": "1.2.3"})
+    return results
+
+
+def bench_download(module, server, sizes, segments_list, samples):
+    results = []
+    for size in sizes:
+        for segments in segments_list:
+            times = []
+            for index in range(samples):
+                key = f"bench-{size}-{segments}-{index}-{time.time_ns()}"
+                elapsed, handler = run_handler(module.AddonUpdateDownloadHandler,
+                                               f"{server.url}/files/{size}",
+                                               key=key,
+                                               segments=segments)
+                os.remove(handler.path)
+                times.append(elapsed)
+            result = summarize(times)
+            result.update(name=f"{size // 1024}k-{segments}", size=size, segments=segments,
+                          throughput_mbps=size / (result["median_ms"] / 1000.0) / 1e6)
+            results.append(result)
+
+        # Repeated downloads of one release are served from the download cache
+        key = f"bench-cached-{size}-{time.time_ns()}"
+        times = []
+        for _ in range(samples + 1):
+            elapsed, handler = run_handler(module.AddonUpdateDownloadHandler, f"{server.url}/files/{size}", key=key)
+            times.append(elapsed)
+        if not handler.cached:
+            raise RuntimeError("Repeated download was not served from the download cache")
+        result = summarize(times[1:])
+        result.update(name=f"{size // 1024}k-cached", size=size, segments=0)
+        results.append(result)
+    return results
+
+
+def make_addon(root, name, files, file_size):
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    with open(os.path.join(path, "__init__.py"), "w") as file:
+        file.write(f"bl_info = {{'name': {name!r}, 'version': (1, 0, 0)}}\n")
+    for index in range(files):
+        target = os.path.join(path, "data", f"{index // 100:02d}", f"file_{index:05d}.bin")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as file:
+            file.write(os.urandom(file_size))
+    return path
+
+
+def make_release(addon_path, name, path, changed=10):
+    # Every changed-th file differs from the installed addon, the rest are identical
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        index = 0
+        for dirpath, _, filenames in os.walk(addon_path):
+            for filename in sorted(filenames):
+                source = os.path.join(dirpath, filename)
+                relpath = os.path.relpath(source, addon_path).replace(os.sep, "/")
+                with open(source, "rb") as file:
+                    data = file.read()
+                if relpath != "__init__.py" and index % changed == 0:
+                    data = os.urandom(len(data))
+                archive.writestr(f"{name}/{relpath}", data)
+                index += 1
+    return path
+
+
+def bench_install(module, root, addons, samples):
+    results = []
+    for files, file_size in addons:
+        name = f"bench_addon_{files}_{file_size}"
+        addon_path = make_addon(os.path.join(root, "addons"), name, files, file_size)
+        release = make_release(addon_path, name, os.path.join(root, f"{name}.zip"))
+        harness.add_addon(module, name, addon_path)
+
+        times = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            snapshot = module._create_addon_snapshot(addon_path, "bench")
+            times.append(time.perf_counter() - start)
+            shutil.rmtree(snapshot)
+        results.append(dict(summarize(times), name=f"{files}x{file_size}-snapshot",
+                            files=files, file_size=file_size))
+
+        for mode in ("RENAME", "HARDLINK"):
+            module.register(name, "", backup_mode=mode, backup_limit=2)
+            times = []
+            steps = {}
+            for _ in range(samples):
+                handler = module.AddonUpdateInstallHandler(name, release, addon_path, "1.0.0")
+                start = time.perf_counter()
+                handler.run()
+                harness.run_timers()
+                times.append(time.perf_counter() - start)
+                if handler.error:
+                    raise handler.error
+                for step, elapsed in handler.timings:
+                    steps.setdefault(step, []).append(elapsed)
+            result = summarize(times)
+            result.update(name=f"{files}x{file_size}-{mode.lower()}", files=files, file_size=file_size,
+                          backup_mode=mode,
+                          steps={step: statistics.median(values) * 1000.0 for step, values in steps.items()})
+            results.append(result)
+            module.unregister(name)
+    return results
+
+
+def bench_draw(module, iterations):
+    name = "bench_draw"
+    prefs = harness.add_addon(module, name, os.path.join(tempfile.gettempdir(), name))
+    module.register(name, "")
+    prefs.api_token = "token"
+    prefs.new_release_version = "1.2.3"
+    prefs.new_release_date = "20260101"
+    prefs.new_release_notes = "https://example.com/notes"
+    prefs.update_bytes_received = 3.0 * MIB
+    prefs.update_bytes_total = 16.0 * MIB
+    prefs.update_throughput = 2.0 * MIB
+    prefs.update_eta = 6.5
+    prefs.update_error = "Failed"
+
+    results = []
+    for status in ('NONE', 'CHECKING', 'AVAILABLE', 'DOWNLOADING', 'READY', 'ERROR'):
+        prefs.update_status = status
+        prefs.layout = harness.Layout()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            prefs.draw(None)
+        elapsed = time.perf_counter() - start
+        results.append({"name": status.lower(),
+                        "iterations": iterations,
+                        "mean_us": elapsed / iterations * 1e6})
+    module.unregister(name)
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=harness.ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(config):
+    root = tempfile.mkdtemp(prefix="bl_addon_update_bench_")
+    module = harness.load_package()
+    module.register("bench", "", cache_directory=os.path.join(root, "cache"))
+    server = UpdateServer({"url": "", "version": "1.2.3"}).start()
+    try:
+        return {
+            "meta": {
+                "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "commit": get_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "quick": config is QUICK,
+                },
+            "startup": startup.measure(harness.ROOT, config["startup_samples"], 5),
+            "check": bench_check(module, server, config["samples"]),
+            "compression": bench_compression(module, server, config["releases"],
+                                             config["check_rate"], config["samples"]),
+            "download": bench_download(module, server, config["download_sizes"],
+                                       config["download_segments"], config["samples"]),
+            "install": bench_install(module, root, config["addons"], config["samples"]),
+            "draw": bench_draw(module, config["draw_iterations"]),
+            "contention": contention.measure(config["contention_workers"], config["contention_size"]),
+            }
+    finally:
+        server.stop()
+        module.unregister()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def flatten(results, prefix=""):
+    # Maps dotted names to every timing and throughput in a result set. List items are
+    # keyed by their name so results stay comparable when entries are added.
+    metrics = {}
+    items = results.items() if isinstance(results, dict) else ((item.get("name", str(index)), item)
+                                                                for index, item in enumerate(results))
+    for key, value in items:
+        if key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, (dict, list)):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and name.endswith(("_ms", "_us", "_mbps")):
+            metrics[name] = float(value)
+    return metrics
+
+
+def compare(baseline, results, tolerance):
+    old = flatten(baseline)
+    new = flatten(results)
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        if not old[name]:
+            continue
+        change = (new[name] - old[name]) / old[name]
+        if name.endswith("_mbps"):
+            change = -change
+        marker = ""
+        if change > tolerance:
+            marker = "  REGRESSION"
+            regressions += 1
+        print(f"{name:60s} {old[name]:12.3f} {new[name]:12.3f} {change:+8.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="Fewer samples and smaller sizes")
+    parser.add_argument("--output", default="", help="Write the results to this JSON file")
+    parser.add_argument("--compare", default="", help="Compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown when comparing")
+    args = parser.parse_args()
+
+    results = run(QUICK if args.quick else FULL)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(baseline, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
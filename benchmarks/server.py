@@ -0,0 +1,199 @@
+# Local update endpoint for the benchmarks.
+#
+#   /check         update check response, honours If-None-Match and Accept-Encoding
+#   /files/<size>  <size> bytes of generated data, honours single Range requests and
+#                  can drop the connection part way through (UpdateServer.drop_files_after)
+#   /static/<name> files registered with UpdateServer.add_file
+import http.server
+import json
+import os
+import socket
+import threading
+import time
+import zlib
+
+_BLOCK = bytes(range(256)) * 4096
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # Headers and body are written separately, which Nagle's algorithm would hold back
+        # until the client's delayed ACK
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.request_log.append((path, dict(self.headers)))
+        if path == "/check":
+            return self._send_check()
+        if path.startswith("/files/"):
+            return self._send_generated(int(path[len("/files/"):]))
+        if path.startswith("/static/"):
+            return self._send_static(path[len("/static/"):])
+        self.send_error(404)
+
+    def _send_check(self):
+        etag = '"check-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(self.server.check_response).encode("utf-8")
+        encoding = self.server.encoding
+        accepted = {value.split(";")[0].strip() for value in self.headers.get("Accept-Encoding", "").split(",")}
+        if encoding not in accepted:
+            encoding = "identity"
+        elif encoding == "gzip":
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+        elif encoding == "deflate":
+            body = zlib.compress(body, 6)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self._write_limited(body)
+
+    def _write_limited(self, body):
+        # Paces the body to the server's rate in bytes per second, when set
+        rate = self.server.rate
+        if not rate:
+            return self.wfile.write(body)
+        chunk_size = max(rate // 50, 1024)
+        start = time.perf_counter()
+        for offset in range(0, len(body), chunk_size):
+            self.wfile.write(body[offset:offset + chunk_size])
+            delay = start + (offset + chunk_size) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def _get_range(self, size):
+        value = self.headers.get("Range", "")
+        if not value.startswith("bytes="):
+            return 0, size - 1, False
+        start, _, end = value[len("bytes="):].partition("-")
+        return int(start), min(int(end) if end else size - 1, size - 1), True
+
+    def _send_headers(self, size, start, end, partial):
+        self.send_response(206 if partial else 200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{size}"')
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+    def _count_bytes(self, size):
+        with self.server.lock:
+            self.server.bytes_sent += size
+
+    def _send_generated(self, size):
+        start, end, partial = self._get_range(size)
+        self._send_headers(size, start, end, partial)
+        self._count_bytes(end - start + 1)
+        pos = start
+        with self.server.lock:
+            drop, self.server.drop_after = self.server.drop_after, 0
+        if drop:
+            end = min(end, start + drop - 1)
+            self.close_connection = True
+        while pos <= end:
+            offset = pos % len(_BLOCK)
+            chunk = _BLOCK[offset:offset + min(end - pos + 1, len(_BLOCK) - offset)]
+            self.wfile.write(chunk)
+            pos += len(chunk)
+        if drop:
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+
+    def _send_static(self, name):
+        path = self.server.files.get(name)
+        if path is None:
+            return self.send_error(404)
+        size = os.path.getsize(path)
+        start, end, partial = self._get_range(size)
+        self._send_headers(size, start, end, partial)
+        self._count_bytes(end - start + 1)
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining:
+                chunk = file.read(min(remaining, 1 << 20))
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+class UpdateServer:
+
+    def __init__(self, check_response=None):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.check_response = check_response or {}
+        self._server.files = {}
+        self._server.encoding = "identity"
+        self._server.rate = 0
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._server.bytes_sent = 0
+        self._server.request_log = []
+        self._server.drop_after = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_check_response(self, data):
+        self._server.check_response = data
+
+    def set_check_encoding(self, encoding, rate=0):
+        # Content-Encoding for /check when the client accepts it and an optional rate
+        # limit for its body in bytes per second
+        self._server.encoding = encoding
+        self._server.rate = rate
+
+    @property
+    def request_log(self):
+        # (path, headers) of every request so far
+        return list(self._server.request_log)
+
+    def drop_files_after(self, size):
+        # The next /files response is cut off after size bytes and its connection closed
+        self._server.drop_after = size
+
+    def stats(self, reset=False):
+        # Requests served and file bytes sent, /check bodies are not counted
+        server = self._server
+        with server.lock:
+            result = {"requests": server.requests, "bytes_sent": server.bytes_sent}
+            if reset:
+                server.requests = server.bytes_sent = 0
+        return result
+
+    def add_file(self, name, path):
+        self._server.files[name] = path
+        return f"{self.url}/static/{name}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,84 @@
+# Measures the cost the package adds to Blender's startup: importing it and calling
+# register() for each addon that vendors it. Every sample runs in a fresh interpreter
+# with the stub bpy so module caching does not hide import cost.
+#
+#   python benchmarks/startup.py [--samples 20] [--addons 5] [--package DIR] [--budget MS]
+#
+# --package measures another checkout, e.g. one exported with git archive, so releases
+# can be compared. --budget fails when the median import plus register time exceeds it.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "benchmarks", "stubs")
+
+# Modules the package should only load once a check or install runs
+LAZY_MODULES = ("datetime", "zipfile", "re", "urllib.request", "urllib.parse", "queue",
+                "http.client", "ssl", "json", "hashlib", "concurrent.futures")
+
+SAMPLE = r'''
+import importlib.util, json, sys, time
+sys.path.insert(0, {stubs!r})
+import bpy, addon_utils
+before = set(sys.modules)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("addon_update", {init!r}, submodule_search_locations=[{package!r}])
+module = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = module
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+for index in range({addons}):
+    module.register(f"addon_{{index}}", "https://example.com/update")
+registered = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "register": registered - imported,
+    "modules": sorted(set(sys.modules) - before),
+    }}))
+'''
+
+
+def run_sample(package: str, addons: int) -> dict:
+    code = SAMPLE.format(stubs=STUBS, package=package, init=os.path.join(package, "__init__.py"), addons=addons)
+    output = subprocess.run([sys.executable, "-S", "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(package: str, samples: int, addons: int) -> dict:
+    results = [run_sample(package, addons) for _ in range(samples)]
+    modules = results[-1]["modules"]
+    return {
+        "package": package,
+        "samples": samples,
+        "addons": addons,
+        "import_ms": statistics.median(result["import"] for result in results) * 1000.0,
+        "register_ms": statistics.median(result["register"] for result in results) * 1000.0,
+        "modules_loaded": len(modules),
+        "lazy_modules_loaded": [name for name in LAZY_MODULES if name in modules],
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--addons", type=int, default=5)
+    parser.add_argument("--package", default=ROOT)
+    parser.add_argument("--budget", type=float, default=0.0, help="Budget for import + register in ms")
+    args = parser.parse_args()
+
+    result = measure(os.path.abspath(args.package), args.samples, args.addons)
+    print(json.dumps(result, indent=2))
+
+    total = result["import_ms"] + result["register_ms"]
+    if args.budget and total > args.budget:
+        print(f"Startup cost {total:.2f} ms exceeds budget of {args.budget:.2f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+# Stand-in for Blender's addon_utils. Benchmarks put their fake addon modules in
+# addons_fake_modules.
+addons_fake_modules = {}
+
+
+def modules_refresh(module_cache=addons_fake_modules) -> None:
+    pass
+
+
+def modules(module_cache=addons_fake_modules, *, refresh=True):
+    if refresh:
+        modules_refresh(module_cache)
+    return list(module_cache.values())
+
+
+def enable(module_name, *, default_set=False, persistent=False, handle_error=None):
+    return addons_fake_modules.get(module_name)
+
+
+def disable(module_name, *, default_set=False, handle_error=None) -> None:
+    pass
@@ -0,0 +1,23 @@
+# Minimal stand-in for Blender's bpy module so the package can be imported and
+# exercised outside Blender by the benchmarks. Only what the package touches exists.
+import types as _types
+from . import app, ops, props, types, utils
+
+
+class _Preferences:
+
+    def __init__(self) -> None:
+        self.addons = {}
+
+
+class _Context:
+
+    def __init__(self) -> None:
+        self.preferences = _Preferences()
+        self.window_manager = _types.SimpleNamespace(windows=[])
+        self.area = None
+        self.window = None
+
+
+context = _Context()
+data = _types.SimpleNamespace(texts={})
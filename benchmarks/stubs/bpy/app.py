@@ -0,0 +1,20 @@
+version = (3, 6, 0)
+background = True
+
+
+class _Timers:
+
+    def __init__(self) -> None:
+        self.functions = {}
+
+    def register(self, function, first_interval=0.0, persistent=False) -> None:
+        self.functions[function] = first_interval
+
+    def unregister(self, function) -> None:
+        self.functions.pop(function, None)
+
+    def is_registered(self, function) -> bool:
+        return function in self.functions
+
+
+timers = _Timers()
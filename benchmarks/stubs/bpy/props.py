@@ -0,0 +1,11 @@
+def _property(kind):
+    def define(**kwargs):
+        return (kind, kwargs)
+    return define
+
+
+BoolProperty = _property("BOOLEAN")
+EnumProperty = _property("ENUM")
+FloatProperty = _property("FLOAT")
+IntProperty = _property("INT")
+StringProperty = _property("STRING")
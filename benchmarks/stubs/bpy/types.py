@@ -0,0 +1,9 @@
+class Operator:
+    bl_idname = ""
+
+    def report(self, type, message) -> None:
+        pass
+
+
+class AddonPreferences:
+    bl_idname = ""
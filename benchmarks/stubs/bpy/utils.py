@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+registered = []
+
+
+def register_class(cls) -> None:
+    registered.append(cls)
+
+
+def unregister_class(cls) -> None:
+    registered.remove(cls)
+
+
+def user_resource(resource_type, path="", create=False) -> str:
+    return os.path.join(tempfile.gettempdir(), "bl_addon_update_strategy_bench", resource_type.lower(), path)